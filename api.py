@@ -0,0 +1,573 @@
+"""
+Local HTTP API for submitting files programmatically.
+
+Jobs are created, receive their uploads, and are then processed by a bounded
+pool of worker processes. Clients poll the job status and download the
+result tables as CSV, Excel or Parquet. Uploads are released once a job is
+submitted, and finished jobs are kept for FINISHED_JOB_TTL seconds (at most
+MAX_FINISHED_JOBS of them) or until they are deleted.
+
+Endpoints:
+    POST /jobs                                  Create a job
+    PUT  /jobs/<id>/rs-totales                  Upload the RS totales file (raw body)
+    PUT  /jobs/<id>/variant-tables/<filename>   Upload a variant table (raw body)
+    POST /jobs/<id>/submit[?duplicate_policy=]  Queue the job for processing
+    GET  /jobs/<id>                             Job status, validation and duplicate reports
+    GET  /jobs/<id>/results/<table>.<format>    Download a table: codes or nucleotides,
+                                                as csv, xlsx or parquet
+    GET  /jobs/<id>/profile.<format>            Download the profile of the job as pstats,
+                                                collapsed (flamegraph stacks) or txt (summary),
+                                                when SEQUENCE_EXTRACTOR_PROFILE=1
+    DELETE /jobs/<id>                           Delete a job that is not queued or running
+
+Run with:
+    python api.py --port 8000 --workers 4
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+from file_utils import to_excel, to_parquet
+from processing import process_uploads, ProcessingError
+from deduplication import POLICIES, POLICY_FLAG
+from profiling import profile_run, profiling_enabled_from_env, ProfilerBusyError, PROFILE_ENV_VAR
+from validation import WORKER_START_METHOD
+
+# Job status constants
+STATUS_UPLOADING = "uploading"  # Waiting for files and submission
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+TABLES = ["codes", "nucleotides"]
+
+FORMATS = {
+    "csv": ("text/csv", lambda df: df.to_csv(index=False).encode("utf-8")),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", to_excel),
+    "parquet": ("application/vnd.apache.parquet", to_parquet),
+}
+
+PROFILE_FORMATS = {
+    "pstats": "application/octet-stream",
+    "collapsed": "text/plain; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+}
+
+# Largest accepted upload, in bytes
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+
+# Seconds a finished job and its results are kept
+FINISHED_JOB_TTL = 3600
+
+# Finished jobs kept at most; the oldest ones are removed first
+MAX_FINISHED_JOBS = 1000
+
+
+def run_job(rs_totales, variant_tables, duplicate_policy):
+    """
+    Process one job. Runs in a worker process.
+
+    Args:
+        rs_totales (tuple): (filename, contents) of the RS totales file
+        variant_tables (list): (filename, contents) of each variant table, in upload order
+        duplicate_policy (str): Policy for files of the same individual
+
+    Returns:
+        dict: 'tables' with the result DataFrames by table name, 'validation_issues'
+              and 'duplicates' as JSON-ready records, 'error' (None on success) and,
+              when profiling is enabled, 'profile' with the data by PROFILE_FORMATS key,
+              or 'profile_error' if the job could not be profiled
+    """
+    if not profiling_enabled_from_env():
+        return _process_job(rs_totales, variant_tables, duplicate_policy)
+
+    # Only one job per process can be profiled at a time (e.g. with a thread pool executor)
+    try:
+        with profile_run() as profile:
+            result = _process_job(rs_totales, variant_tables, duplicate_policy)
+    except ProfilerBusyError as e:
+        result = _process_job(rs_totales, variant_tables, duplicate_policy)
+        result["profile_error"] = str(e)
+        return result
+
+    result["profile"] = {
+        "pstats": profile.pstats_data,
+        "collapsed": profile.collapsed_stacks.encode("utf-8"),
+        "txt": profile.summary.encode("utf-8"),
+    }
+    return result
+
+
+def _process_job(rs_totales, variant_tables, duplicate_policy):
+    """Process one job without profiling. See run_job."""
+    try:
+        store, validation_report = process_uploads(
+            _as_upload(*rs_totales),
+            [_as_upload(name, contents) for name, contents in variant_tables],
+            duplicate_policy,
+            # Jobs already run in a pool worker, so don't start a nested pool
+            parallel_validation=False
+        )
+        result = store.query()
+    except ProcessingError as e:
+        return {
+            "tables": {},
+            "validation_issues": _records(e.validation_report),
+            "duplicates": [],
+            "error": str(e)
+        }
+    except ValueError as e:
+        return {"tables": {}, "validation_issues": [], "duplicates": [], "error": str(e)}
+
+    return {
+        "tables": {"codes": result.codes_table, "nucleotides": result.nucleotides_table},
+        "validation_issues": _records(validation_report),
+        "duplicates": _records(store.duplicates_report),
+        "error": None
+    }
+
+
+def _as_upload(name, contents):
+    """Wrap uploaded bytes in a named file object, like a Streamlit upload."""
+    file = io.BytesIO(contents)
+    file.name = name
+    return file
+
+
+def _records(report):
+    """Convert a report DataFrame to JSON-ready records."""
+    if report is None:
+        return []
+    return json.loads(report.to_json(orient="records"))
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are waiting for a worker."""
+
+
+class WorkerPoolError(Exception):
+    """Raised when the worker pool is broken (e.g. a worker was killed) and a new one was started."""
+
+
+class Job:
+    def __init__(self):
+        """Initialize an empty Job waiting for uploads."""
+        self.id = uuid.uuid4().hex
+        # (filename, contents) of the uploads, released once the job is submitted
+        self.rs_totales = None
+        self.variant_tables = []
+        self.rs_totales_name = None
+        self.variant_table_names = []
+        self.future = None
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+    @property
+    def status(self):
+        """str: One of the status constants"""
+        if self.future is None:
+            return STATUS_UPLOADING
+        # The outcome is stored by a callback shortly after the future completes,
+        # setting the error before the result so a failed job never looks done
+        if self.result is None and self.error is None:
+            return STATUS_RUNNING if self.future.running() or self.future.done() else STATUS_QUEUED
+        return STATUS_FAILED if self.error else STATUS_DONE
+
+    def to_dict(self):
+        """
+        Describe the job for status responses.
+
+        Returns:
+            dict: JSON-ready job description
+        """
+        result = self.result or {}
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "rs_totales": self.rs_totales_name,
+            "variant_tables": list(self.variant_table_names),
+            "error": self.error,
+            "validation_issues": result.get("validation_issues", []),
+            "duplicates": result.get("duplicates", []),
+            "profiled": "profile" in result,
+            "profile_error": result.get("profile_error"),
+        }
+
+
+class JobService:
+    def __init__(self, max_workers=None, max_queued_jobs=100, executor=None,
+                 finished_job_ttl=FINISHED_JOB_TTL, max_finished_jobs=MAX_FINISHED_JOBS):
+        """
+        Initialize a JobService.
+
+        Args:
+            max_workers (int, optional): Number of worker processes
+            max_queued_jobs (int): Maximum number of submitted jobs not yet finished
+            executor (optional): Executor to use instead of a process pool
+            finished_job_ttl (float): Seconds a finished job is kept
+            max_finished_jobs (int): Maximum number of finished jobs kept
+        """
+        self.max_queued_jobs = max_queued_jobs
+        self.finished_job_ttl = finished_job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.max_workers = max_workers
+        # Only a pool created here can be replaced when it breaks
+        self._owns_executor = executor is None
+        self._executor = executor or self._new_executor()
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def create_job(self):
+        """Create and register a new job, removing expired finished jobs."""
+        job = Job()
+        with self._lock:
+            self._evict_finished_jobs()
+            self._jobs[job.id] = job
+        return job
+
+    def get_job(self, job_id):
+        """Get a job by ID, or None if it doesn't exist."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def delete_job(self, job):
+        """
+        Remove a job and its results.
+
+        Raises:
+            ValueError: If the job is queued or running
+        """
+        with self._lock:
+            if job.future is not None and job.finished_at is None:
+                raise ValueError("The job is still being processed")
+            self._jobs.pop(job.id, None)
+
+    def add_upload(self, job, name, contents, rs_totales=False):
+        """
+        Store an uploaded file in a job.
+
+        Args:
+            job (Job): Job receiving the file
+            name (str): Filename of the upload
+            contents (bytes): Contents of the upload
+            rs_totales (bool): True for the RS totales file, which replaces any previous one
+
+        Raises:
+            ValueError: If the job was already submitted
+        """
+        with self._lock:
+            if job.future is not None:
+                raise ValueError("The job was already submitted")
+            if rs_totales:
+                job.rs_totales = (name, contents)
+                job.rs_totales_name = name
+            else:
+                job.variant_tables.append((name, contents))
+                job.variant_table_names.append(name)
+
+    def submit(self, job, duplicate_policy=POLICY_FLAG):
+        """
+        Queue a job for processing.
+
+        Raises:
+            ValueError: If the job was already submitted or lacks input files
+            QueueFullError: If too many jobs are already pending
+            WorkerPoolError: If the worker pool is broken; a new pool is started for later jobs
+        """
+        with self._lock:
+            if job.future is not None:
+                raise ValueError("The job was already submitted")
+            if job.rs_totales is None or not job.variant_tables:
+                raise ValueError("Upload the RS totales file and at least one variant table first")
+            if self._pending >= self.max_queued_jobs:
+                raise QueueFullError(f"Too many pending jobs (maximum {self.max_queued_jobs})")
+
+            executor = self._executor
+            try:
+                job.future = executor.submit(run_job, job.rs_totales, job.variant_tables, duplicate_policy)
+            except BrokenExecutor as e:
+                self._replace_executor(executor)
+                raise WorkerPoolError(f"The worker pool stopped unexpectedly, try again: {e}") from e
+            self._pending += 1
+            # The executor holds the uploads until the job runs
+            job.rs_totales = None
+            job.variant_tables = []
+
+        job.future.add_done_callback(lambda future: self._finish(job, future, executor))
+
+    def shutdown(self):
+        """Stop the worker pool, waiting for running jobs."""
+        self._executor.shutdown(wait=True)
+
+    def _new_executor(self):
+        """Create the worker pool. Workers aren't forked, as the server is multithreaded."""
+        return ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD))
+
+    def _replace_executor(self, broken_executor):
+        """Start a new worker pool if the broken one is still in use. Called with the lock held."""
+        if self._owns_executor and self._executor is broken_executor:
+            broken_executor.shutdown(wait=False)
+            self._executor = self._new_executor()
+
+    def _finish(self, job, future, executor):
+        """Store the outcome of a finished job."""
+        broken = False
+        try:
+            result = future.result()
+            error = result["error"]
+        except BrokenExecutor as e:
+            broken = True
+            result, error = None, f"A worker process stopped unexpectedly: {e}"
+        except Exception as e:
+            result, error = None, f"Unexpected error: {e}"
+
+        with self._lock:
+            # The error goes first, as status is read without the lock
+            job.error = error
+            job.result = result
+            job.finished_at = time.monotonic()
+            self._pending -= 1
+            if broken:
+                self._replace_executor(executor)
+
+    def _evict_finished_jobs(self):
+        """Remove expired finished jobs, and the oldest ones over the maximum. Called with the lock held."""
+        now = time.monotonic()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        excess = len(finished) - self.max_finished_jobs
+        for position, job in enumerate(finished):
+            if position < excess or now - job.finished_at > self.finished_job_ttl:
+                del self._jobs[job.id]
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    JOB_PATH = re.compile(r"^/jobs/([0-9a-f]+)$")
+    RS_TOTALES_PATH = re.compile(r"^/jobs/([0-9a-f]+)/rs-totales$")
+    VARIANT_TABLE_PATH = re.compile(r"^/jobs/([0-9a-f]+)/variant-tables/([^/]+)$")
+    SUBMIT_PATH = re.compile(r"^/jobs/([0-9a-f]+)/submit$")
+    RESULT_PATH = re.compile(r"^/jobs/([0-9a-f]+)/results/(\w+)\.(\w+)$")
+    PROFILE_PATH = re.compile(r"^/jobs/([0-9a-f]+)/profile\.(\w+)$")
+
+    @property
+    def service(self):
+        """JobService: The service of the running server"""
+        return self.server.service
+
+    def do_POST(self):
+        url = urlparse(self.path)
+
+        if url.path == "/jobs":
+            job = self.service.create_job()
+            return self._send_json(201, job.to_dict())
+
+        match = self.SUBMIT_PATH.match(url.path)
+        if match:
+            job = self._get_job_or_404(match.group(1))
+            if job is None:
+                return
+            duplicate_policy = parse_qs(url.query).get("duplicate_policy", [POLICY_FLAG])[0]
+            if duplicate_policy not in POLICIES:
+                return self._send_error(400, f"Unknown duplicate policy: {duplicate_policy}")
+            try:
+                self.service.submit(job, duplicate_policy)
+            except (QueueFullError, WorkerPoolError) as e:
+                return self._send_error(503, str(e))
+            except ValueError as e:
+                return self._send_error(409, str(e))
+            return self._send_json(202, job.to_dict())
+
+        self._send_error(404, "Not found")
+
+    def do_PUT(self):
+        path = urlparse(self.path).path
+
+        rs_match = self.RS_TOTALES_PATH.match(path)
+        variant_match = self.VARIANT_TABLE_PATH.match(path)
+        match = rs_match or variant_match
+        if not match:
+            return self._send_error(404, "Not found")
+
+        job = self._get_job_or_404(match.group(1))
+        if job is None:
+            return
+
+        contents = self._read_body()
+        if contents is None:
+            return
+
+        try:
+            if rs_match:
+                self.service.add_upload(job, self.headers.get("X-Filename", "rs-totales.xlsx"), contents, rs_totales=True)
+            else:
+                self.service.add_upload(job, unquote(variant_match.group(2)), contents)
+        except ValueError as e:
+            return self._send_error(409, str(e))
+
+        self._send_json(200, job.to_dict())
+
+    def do_DELETE(self):
+        match = self.JOB_PATH.match(urlparse(self.path).path)
+        if not match:
+            return self._send_error(404, "Not found")
+
+        job = self._get_job_or_404(match.group(1))
+        if job is None:
+            return
+        try:
+            self.service.delete_job(job)
+        except ValueError as e:
+            return self._send_error(409, str(e))
+
+        self._send_json(200, {"job_id": job.id, "deleted": True})
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        match = self.JOB_PATH.match(path)
+        if match:
+            job = self._get_job_or_404(match.group(1))
+            if job is not None:
+                self._send_json(200, job.to_dict())
+            return
+
+        match = self.RESULT_PATH.match(path)
+        if match:
+            return self._send_result(*match.groups())
+
+        match = self.PROFILE_PATH.match(path)
+        if match:
+            return self._send_profile(*match.groups())
+
+        self._send_error(404, "Not found")
+
+    def _send_result(self, job_id, table, file_format):
+        """Send a result table of a finished job in the requested format."""
+        job = self._get_job_or_404(job_id)
+        if job is None:
+            return
+        if table not in TABLES or file_format not in FORMATS:
+            return self._send_error(404, f"Unknown result: {table}.{file_format}")
+        status = job.status
+        tables = (job.result or {}).get("tables", {})
+        if status != STATUS_DONE or table not in tables:
+            return self._send_error(409, f"The job is {status}")
+
+        content_type, convert = FORMATS[file_format]
+        try:
+            body = convert(tables[table])
+        except ImportError as e:
+            return self._send_error(501, f"Format not available: {e}")
+
+        self._send_file(body, content_type, f"variant_{table}_table.{file_format}")
+
+    def _send_profile(self, job_id, file_format):
+        """Send the profile of a finished, profiled job in the requested format."""
+        job = self._get_job_or_404(job_id)
+        if job is None:
+            return
+        if file_format not in PROFILE_FORMATS:
+            return self._send_error(404, f"Unknown profile format: {file_format}")
+        if job.result is not None and job.result.get("profile_error"):
+            return self._send_error(409, f"The job was not profiled: {job.result['profile_error']}")
+        if job.result is None or "profile" not in job.result:
+            return self._send_error(409, f"No profile for this job (set {PROFILE_ENV_VAR}=1 and wait for it to finish)")
+
+        self._send_file(job.result["profile"][file_format], PROFILE_FORMATS[file_format], f"profile.{file_format}")
+
+    def _get_job_or_404(self, job_id):
+        """Get a job, sending a 404 response if it doesn't exist."""
+        job = self.service.get_job(job_id)
+        if job is None:
+            self._send_error(404, f"Unknown job: {job_id}")
+        return job
+
+    def _read_body(self):
+        """Read the request body, sending an error response if it is missing or too large."""
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_error(400, "Invalid Content-Length header")
+            return None
+        if length <= 0:
+            self._send_error(400, "Empty upload")
+            return None
+        if length > MAX_UPLOAD_SIZE:
+            self._send_error(413, f"Upload larger than {MAX_UPLOAD_SIZE} bytes")
+            return None
+        return self.rfile.read(length)
+
+    def _send_file(self, body, content_type, filename):
+        """Send a file download response."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        """Send a JSON response."""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        """Send a JSON error response."""
+        self._send_json(status, {"error": message})
+
+
+def create_server(host="127.0.0.1", port=8000, service=None):
+    """
+    Create the HTTP server, without starting it.
+
+    Args:
+        host (str): Address to bind
+        port (int): Port to bind, 0 for any free port
+        service (JobService, optional): Service to use instead of a default one
+
+    Returns:
+        ThreadingHTTPServer: The server, with the job service as its 'service' attribute
+    """
+    server = ThreadingHTTPServer((host, port), ApiRequestHandler)
+    server.service = service or JobService()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP API for the Sequence Extractor")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--max-queued-jobs", type=int, default=100)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, JobService(args.workers, args.max_queued_jobs))
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
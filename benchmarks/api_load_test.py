@@ -0,0 +1,154 @@
+"""
+Load test for the local HTTP API.
+
+Submits many jobs concurrently to a local API instance and reports the job
+throughput and latency percentiles. By default a server is started in this
+process; use --url to target an already running instance.
+
+Run with:
+    python -m benchmarks.api_load_test --jobs 40 --concurrency 8 --workers 4
+"""
+
+import argparse
+import io
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from api import create_server, JobService, STATUS_DONE, STATUS_FAILED
+
+
+def make_cohort(num_rs, num_individuals, calls_per_individual, seed=0):
+    """
+    Generate a synthetic RS totales file and variant tables as Excel bytes.
+
+    Returns:
+        tuple: (rs_totales_bytes, [(filename, variant_table_bytes), ...])
+    """
+    rng = random.Random(seed)
+    rs_ids = [f"rs{1000 + i}" for i in range(num_rs)]
+    rs_totales = pd.DataFrame({
+        'dbSNP ID': rs_ids,
+        'Reference Allele': [rng.choice("ACGT") for _ in rs_ids],
+        'Codigo reference allele': [100 + i * 2 for i in range(num_rs)],
+        'Variant Allele': [rng.choice("ACGT") for _ in rs_ids],
+        'Codigo variant allele': [101 + i * 2 for i in range(num_rs)],
+    })
+
+    variant_tables = []
+    for individual in range(num_individuals):
+        called = rng.sample(rs_ids, min(calls_per_individual, num_rs))
+        table = pd.DataFrame({
+            'dbSNP ID': called,
+            'Variant Frequency': [rng.choice([0.5, 0.48, 1, 0.97]) for _ in called],
+            'Reference Allele': ['A'] * len(called),
+            'Variant Allele': ['G'] * len(called),
+        })
+        variant_tables.append((f"{individual + 1}-variant-table.xlsx", _to_excel_bytes(table)))
+
+    return _to_excel_bytes(rs_totales), variant_tables
+
+
+def _to_excel_bytes(df):
+    output = io.BytesIO()
+    df.to_excel(output, index=False)
+    return output.getvalue()
+
+
+def _request(method, url, body=None):
+    with urllib.request.urlopen(urllib.request.Request(url, data=body, method=method)) as response:
+        return response.read()
+
+
+def run_client_job(base_url, rs_totales, variant_tables, poll_interval=0.05):
+    """
+    Run one job end to end: create, upload, submit, poll and download.
+
+    Returns:
+        tuple: (status, seconds from creation to downloaded results)
+    """
+    start = time.perf_counter()
+    job = json.loads(_request("POST", f"{base_url}/jobs"))
+    job_url = f"{base_url}/jobs/{job['job_id']}"
+
+    _request("PUT", f"{job_url}/rs-totales", rs_totales)
+    for name, contents in variant_tables:
+        _request("PUT", f"{job_url}/variant-tables/{name}", contents)
+    _request("POST", f"{job_url}/submit")
+
+    while True:
+        status = json.loads(_request("GET", job_url))["status"]
+        if status in (STATUS_DONE, STATUS_FAILED):
+            break
+        time.sleep(poll_interval)
+
+    if status == STATUS_DONE:
+        _request("GET", f"{job_url}/results/codes.csv")
+        _request("GET", f"{job_url}/results/nucleotides.csv")
+
+    return status, time.perf_counter() - start
+
+
+def run_load_test(base_url, rs_totales, variant_tables, jobs, concurrency):
+    """
+    Submit jobs from concurrent clients and measure throughput.
+
+    Returns:
+        dict: Summary with throughput and latency percentiles
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        outcomes = list(clients.map(
+            lambda _: run_client_job(base_url, rs_totales, variant_tables), range(jobs)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in outcomes)
+    return {
+        "jobs": jobs,
+        "failed": sum(1 for status, _ in outcomes if status != STATUS_DONE),
+        "seconds": round(elapsed, 2),
+        "jobs_per_second": round(jobs / elapsed, 2),
+        "latency_p50": round(statistics.median(latencies), 3),
+        "latency_p95": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "latency_max": round(latencies[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the local HTTP API")
+    parser.add_argument("--url", help="Base URL of a running API; by default a local server is started")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes of the local server")
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rs", type=int, default=500, help="RS IDs in the panel")
+    parser.add_argument("--individuals", type=int, default=20, help="Variant tables per job")
+    parser.add_argument("--calls", type=int, default=50, help="Variant calls per individual")
+    args = parser.parse_args()
+
+    rs_totales, variant_tables = make_cohort(args.rs, args.individuals, args.calls)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = create_server(port=0, service=JobService(args.workers, max_queued_jobs=args.jobs))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        summary = run_load_test(base_url, rs_totales, variant_tables, args.jobs, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            server.service.shutdown()
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark of the table engines against the reference builders.
+
+For each cohort size, builds the tables with the reference implementation and
+with every engine in benchmarks.equivalence.ENGINES, checks that every cell
+matches and reports the timings and speedups. A new fast path is only proven
+once it is both equivalent and faster here: the benchmark exits with an error
+if any engine differs from the reference or is slower than --min-speedup.
+
+Run with:
+    python -m benchmarks.engine_benchmark --sizes 50x20 200x50
+"""
+
+import argparse
+import sys
+import time
+from benchmarks.equivalence import ENGINES, make_cohort, reference_engine, compare_results
+
+
+def time_engine(engine, variant_files, rs_data, repeat):
+    """
+    Time an engine, keeping the best of several runs.
+
+    Returns:
+        tuple: (best time in seconds, tables of the last run)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tables = engine(variant_files, rs_data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tables
+
+
+def parse_size(size):
+    """Parse a size like '200x50' into (RS IDs, individuals)."""
+    num_rs, num_individuals = size.lower().split("x")
+    return int(num_rs), int(num_individuals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the table engines against the reference builders")
+    parser.add_argument("--sizes", nargs="+", default=["50x20", "200x50"], help="Cohort sizes as <RS IDs>x<individuals>")
+    parser.add_argument("--call-rate", type=float, default=0.05, help="Fraction of the panel found in each variant table")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine; the best time is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-speedup", type=float, default=1.0, help="Smallest accepted speedup over the reference")
+    args = parser.parse_args()
+
+    print(f"{'size':>12} {'engine':>10} {'seconds':>10} {'speedup':>8} {'diffs':>6}")
+    all_equivalent = True
+    all_faster = True
+    for size in args.sizes:
+        num_rs, num_individuals = parse_size(size)
+        calls = max(1, int(num_rs * args.call_rate))
+        rs_file, variant_files = make_cohort(num_rs, num_individuals, calls, seed=args.seed)
+
+        reference_time, reference_tables = time_engine(reference_engine, variant_files, rs_file.rs_data, args.repeat)
+        print(f"{size:>12} {'reference':>10} {reference_time:>10.4f} {1:>8.1f} {'-':>6}")
+
+        for name, engine in ENGINES.items():
+            engine_time, tables = time_engine(engine, variant_files, rs_file.rs_data, args.repeat)
+            differences = len(compare_results(tables, reference_tables))
+            speedup = reference_time / engine_time
+            all_equivalent = all_equivalent and differences == 0
+            all_faster = all_faster and speedup >= args.min_speedup
+            flag = "  SLOWER" if speedup < args.min_speedup else ""
+            print(f"{size:>12} {name:>10} {engine_time:>10.4f} {speedup:>8.1f} {differences:>6}{flag}")
+
+    # Fail when an engine doesn't match the reference or isn't faster, so the benchmark can gate changes
+    if not all_equivalent:
+        print("FAILED: an engine differs from the reference")
+    if not all_faster:
+        print(f"FAILED: an engine is below the minimum speedup of {args.min_speedup}")
+    if not (all_equivalent and all_faster):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
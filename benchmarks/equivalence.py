@@ -0,0 +1,217 @@
+"""
+Differential harness comparing table engines against the reference builders.
+
+The reference implementation is the cell-by-cell builders in genotype_tables.
+Every faster engine is registered in ENGINES and must produce the same value,
+of the same type, in every cell of every matrix. Randomized cohorts exercise the subtle semantics:
+comma decimals, the startswith('1') shortcut, ROUND_HALF_UP to the nearest 0.5,
+out-of-range and unparseable frequencies, first-match-wins for repeated dbSNP
+IDs and case-insensitive RS ID matching.
+"""
+
+import io
+import random
+import pandas as pd
+from genotype_tables import create_statistics_table, create_nucleotides_table
+from sparse_genotypes import SparseGenotypeMatrix
+from rs_totales_file import RSTotalesFile
+from variant_file import VariantFile
+
+# Names of the tables returned by each engine, in order
+CODES_TABLES = ["stats_df", "case_matrix", "code_type_matrix"]
+NUCLEOTIDES_TABLES = ["nucl_df", "nuc_case_matrix"]
+
+# Frequencies covering every branch of VariantFile._determine_frequency_value
+EDGE_FREQUENCIES = [
+    0.5, 1, 1.0, "0,5", "0.5",
+    "1,000", "10", 1.7, "1e-3",  # startswith('1') shortcut
+    0.25, "0,25", 0.75, "0,75",  # exact halves round up
+    0.24, 0.26, 0.74, 0.76, 0.1, 0, "0",
+    2, -0.5, "-0,5",  # out of range
+    "abc", "", None,  # unparseable
+]
+
+NUCLEOTIDES = "ACGT"
+
+
+def reference_engine(variant_files, rs_data, rows=None, rs_ids=None):
+    """
+    Build the tables with the reference builders.
+
+    Returns:
+        tuple: (codes tables, nucleotides tables)
+    """
+    if rows is not None:
+        variant_files = [variant_files[row] for row in rows]
+    if rs_ids is not None:
+        rs_data = {rs_id: rs_data[rs_id] for rs_id in rs_ids}
+
+    return (
+        create_statistics_table(variant_files, rs_data),
+        create_nucleotides_table(variant_files, rs_data)
+    )
+
+
+def sparse_engine(variant_files, rs_data, rows=None, rs_ids=None):
+    """
+    Build the tables from a SparseGenotypeMatrix.
+
+    Returns:
+        tuple: (codes tables, nucleotides tables)
+    """
+    matrix = SparseGenotypeMatrix(variant_files, rs_data)
+    return matrix.codes_table(rows, rs_ids), matrix.nucleotides_table(rows, rs_ids)
+
+
+# Engines that must match reference_engine cell by cell
+ENGINES = {
+    "sparse": sparse_engine,
+}
+
+
+def make_cohort(num_rs, num_individuals, calls_per_individual, seed=0):
+    """
+    Generate a random cohort covering the edge cases of the reference semantics.
+
+    Args:
+        num_rs (int): RS IDs in the panel
+        num_individuals (int): Variant tables to generate
+        calls_per_individual (int): Panel RS IDs found in each variant table
+        seed (int): Random seed
+
+    Returns:
+        tuple: (rs_file, variant_files) - an RSTotalesFile and VariantFile objects
+    """
+    rng = random.Random(seed)
+    rs_ids = [f"rs{rng.randrange(10 ** 6)}{i}" for i in range(num_rs)]
+
+    # Codes are mostly numbers, with some text, decimal-text and missing codes
+    def random_code(base):
+        return rng.choices([base, str(base), f"{base}.0", f"C{base}", None], weights=[85, 5, 4, 4, 2])[0]
+
+    rs_totales = pd.DataFrame({
+        RSTotalesFile.COL_DBSNP_ID: rs_ids,
+        RSTotalesFile.COL_REFERENCE_ALLELE: [rng.choice(NUCLEOTIDES) for _ in rs_ids],
+        RSTotalesFile.COL_CODIGO_REFERENCE: [random_code(100 + 2 * i) for i in range(num_rs)],
+        RSTotalesFile.COL_VARIANT_ALLELE: [rng.choice(NUCLEOTIDES) for _ in rs_ids],
+        RSTotalesFile.COL_CODIGO_VARIANT: [random_code(101 + 2 * i) for i in range(num_rs)],
+    })
+    rs_file = RSTotalesFile(_named_excel(rs_totales, "rs-totales.xlsx"))
+
+    variant_files = []
+    for individual in range(num_individuals):
+        called = rng.sample(rs_ids, min(calls_per_individual, num_rs))
+        rows = []
+        for rs_id in called:
+            rows.append((_random_case(rng, rs_id), rng.choice(EDGE_FREQUENCIES)))
+            # Repeated dbSNP IDs: only the first occurrence may be used
+            if rng.random() < 0.1:
+                rows.append((_random_case(rng, rs_id), rng.choice(EDGE_FREQUENCIES)))
+        # RS IDs that are not in the panel
+        rows.extend((f"rs{rng.randrange(10 ** 6)}x", rng.choice(EDGE_FREQUENCIES)) for _ in range(3))
+        rng.shuffle(rows)
+
+        data = pd.DataFrame({
+            VariantFile.COL_DBSNP_ID: [rs_id for rs_id, _ in rows],
+            VariantFile.COL_VARIANT_FREQUENCY: pd.Series([frequency for _, frequency in rows], dtype=object),
+            VariantFile.COL_REFERENCE_ALLELE: ["A"] * len(rows),
+            VariantFile.COL_VARIANT_ALLELE: ["G"] * len(rows),
+        })
+        name = f"{individual + 1}-variant-table.xlsx" if rng.random() < 0.9 else f"sample-{individual}.xlsx"
+        variant_files.append(VariantFile(_named_file(name), data=data))
+
+    return rs_file, variant_files
+
+
+def compare_tables(actual, expected, label):
+    """
+    List the differences between two tables, cell by cell.
+
+    Args:
+        actual (pd.DataFrame): Table produced by an engine
+        expected (pd.DataFrame): Table produced by the reference
+        label (str): Name of the table, used in the messages
+
+    Returns:
+        list: Descriptions of the differences, empty if the tables match
+    """
+    if list(actual.columns) != list(expected.columns):
+        return [f"{label}: columns {list(actual.columns)[:5]}... != {list(expected.columns)[:5]}..."]
+    if list(actual.index) != list(expected.index):
+        return [f"{label}: index {list(actual.index)[:5]}... != {list(expected.index)[:5]}..."]
+
+    differences = []
+    for col in expected.columns:
+        for index, actual_value, expected_value in zip(expected.index, actual[col], expected[col]):
+            if not _same_value(actual_value, expected_value):
+                differences.append(f"{label}[{index}, {col!r}]: {actual_value!r} != {expected_value!r}")
+    return differences
+
+
+def compare_engine(engine, variant_files, rs_data, rows=None, rs_ids=None):
+    """
+    Compare every cell of every matrix of an engine with the reference.
+
+    Returns:
+        list: Descriptions of the differences, empty if the engine matches
+    """
+    return compare_results(
+        engine(variant_files, rs_data, rows, rs_ids),
+        reference_engine(variant_files, rs_data, rows, rs_ids)
+    )
+
+
+def compare_results(actual_tables, expected_tables):
+    """
+    Compare every cell of every matrix of two engine results.
+
+    Args:
+        actual_tables (tuple): (codes tables, nucleotides tables) of an engine
+        expected_tables (tuple): (codes tables, nucleotides tables) of the reference
+
+    Returns:
+        list: Descriptions of the differences, empty if the results match
+    """
+    actual_codes, actual_nucleotides = actual_tables
+    expected_codes, expected_nucleotides = expected_tables
+
+    differences = []
+    for label, actual, expected in zip(CODES_TABLES, actual_codes, expected_codes):
+        differences.extend(compare_tables(actual, expected, label))
+    for label, actual, expected in zip(NUCLEOTIDES_TABLES, actual_nucleotides, expected_nucleotides):
+        differences.extend(compare_tables(actual, expected, label))
+    return differences
+
+
+def _same_value(actual, expected):
+    """
+    Compare two cells by type and value.
+
+    Missing values are equal to each other. Otherwise the types must match too,
+    since e.g. 101 and 101.0 are exported differently.
+    """
+    if _is_missing(actual) or _is_missing(expected):
+        return _is_missing(actual) and _is_missing(expected)
+    return type(actual) is type(expected) and bool(actual == expected)
+
+
+def _is_missing(value):
+    return not isinstance(value, str) and pd.isna(value)
+
+
+def _random_case(rng, rs_id):
+    """Randomly change the case of an RS ID, which must not affect matching."""
+    return rng.choice([rs_id, rs_id.upper(), rs_id.capitalize()])
+
+
+def _named_file(name):
+    file = io.BytesIO()
+    file.name = name
+    return file
+
+
+def _named_excel(df, name):
+    file = _named_file(name)
+    df.to_excel(file, index=False)
+    file.seek(0)
+    return file
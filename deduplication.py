@@ -0,0 +1,170 @@
+"""
+Detection of duplicate variant table uploads.
+
+Byte-identical uploads are detected by content hash and parsed only once.
+Files mapping to the same individual ID are then collapsed according to a
+duplicate policy. Every collapsed or flagged file is recorded in a report.
+
+The default policy, POLICY_FLAG, keeps every file like earlier versions did:
+individual IDs only use the leading digits of the filename, so files of
+different samples (e.g. 2024-sampleA.xlsx and 2024-sampleB.xlsx) may share one.
+"""
+
+import pandas as pd
+from file_utils import content_hash
+from variant_file import VariantFile
+
+# Duplicate policies for files of the same individual
+POLICY_KEEP_FIRST = "keep_first"  # Keep the first uploaded file
+POLICY_KEEP_LATEST = "keep_latest"  # Keep the last uploaded file
+POLICY_MERGE = "merge"  # Combine the rows of all files; earlier files win on repeated RS IDs
+POLICY_FLAG = "flag"  # Keep every file as its own row and only report them
+
+# The first policy is the default one
+POLICIES = [POLICY_FLAG, POLICY_KEEP_FIRST, POLICY_KEEP_LATEST, POLICY_MERGE]
+
+# Reason constants
+REASON_IDENTICAL_CONTENT = "IDENTICAL_CONTENT"
+REASON_SAME_INDIVIDUAL = "SAME_INDIVIDUAL"
+
+# Action constants
+ACTION_DROPPED = "DROPPED"
+ACTION_MERGED = "MERGED"
+ACTION_KEPT = "KEPT"
+
+# Report column names
+COL_FILE = "file"
+COL_DUPLICATE_OF = "duplicate_of"
+COL_REASON = "reason"
+COL_ACTION = "action"
+
+REPORT_COLUMNS = [COL_FILE, COL_DUPLICATE_OF, COL_REASON, COL_ACTION]
+
+
+def load_variant_files(variant_tables_files, policy=POLICY_FLAG):
+    """
+    Load the variant files, parsing identical uploads once and collapsing duplicates.
+
+    Args:
+        variant_tables_files: List of variant table file objects, in upload order
+        policy (str): One of POLICIES, applied to files of the same individual
+
+    Returns:
+        tuple: (variant_files, report) - the VariantFile objects to process, in
+               upload order, and a pd.DataFrame with one row per duplicate file
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown duplicate policy: {policy}")
+
+    variant_files, report = _parse_unique_contents(variant_tables_files, keep_copies=policy == POLICY_FLAG)
+
+    # Identical copies share the parsed data of the first upload, and are already reported
+    first_by_data = {}
+    for vf in variant_files:
+        first_by_data.setdefault(id(vf.data), vf)
+    copies = {id(vf) for vf in variant_files if first_by_data[id(vf.data)] is not vf}
+
+    # Group files by individual, keeping the upload order
+    groups = {}
+    for vf in variant_files:
+        groups.setdefault(vf.individual_id(), []).append(vf)
+
+    kept = set()
+    replacements = {}
+    for group in groups.values():
+        if len(group) == 1 or policy == POLICY_FLAG:
+            kept.update(id(vf) for vf in group)
+            if len(group) > 1:
+                report.extend(
+                    _entry(vf, group[0], REASON_SAME_INDIVIDUAL, ACTION_KEPT)
+                    for vf in group[1:] if id(vf) not in copies
+                )
+        elif policy == POLICY_MERGE:
+            merged = _merge(group)
+            kept.add(id(group[0]))
+            replacements[id(group[0])] = merged
+            report.extend(_entry(vf, group[0], REASON_SAME_INDIVIDUAL, ACTION_MERGED) for vf in group[1:])
+        else:
+            keeper = group[0] if policy == POLICY_KEEP_FIRST else group[-1]
+            kept.add(id(keeper))
+            report.extend(
+                _entry(vf, keeper, REASON_SAME_INDIVIDUAL, ACTION_DROPPED)
+                for vf in group if vf is not keeper
+            )
+
+    result = [replacements.get(id(vf), vf) for vf in variant_files if id(vf) in kept]
+    return result, pd.DataFrame(report, columns=REPORT_COLUMNS)
+
+
+def _parse_unique_contents(variant_tables_files, keep_copies=False):
+    """
+    Create a VariantFile per upload, parsing each distinct content only once.
+
+    Identical uploads with the same individual ID are collapsed, unless
+    keep_copies is set. Identical uploads with different individual IDs are
+    kept, sharing the parsed data.
+
+    Args:
+        variant_tables_files: List of variant table file objects
+        keep_copies (bool): Keep identical uploads with the same individual ID too
+
+    Returns:
+        tuple: (variant_files, report_entries)
+    """
+    variant_files = []
+    report = []
+    first_by_hash = {}
+    first_by_key = {}
+
+    for file in variant_tables_files:
+        digest = content_hash(file)
+        original = first_by_hash.get(digest)
+
+        if original is None:
+            vf = VariantFile(file)
+            first_by_hash[digest] = vf
+        else:
+            vf = VariantFile(file, data=original.data)
+
+        key = (digest, vf.individual_id())
+        if key in first_by_key and not keep_copies:
+            report.append(_entry(vf, first_by_key[key], REASON_IDENTICAL_CONTENT, ACTION_DROPPED))
+            continue
+        if original is not None:
+            report.append(_entry(vf, original, REASON_IDENTICAL_CONTENT, ACTION_KEPT))
+
+        first_by_key.setdefault(key, vf)
+        variant_files.append(vf)
+
+    return variant_files, report
+
+
+def _merge(group):
+    """
+    Combine the rows of several files of the same individual into one VariantFile.
+
+    Rows keep the upload order, so earlier files win on repeated RS IDs.
+
+    Args:
+        group (list): VariantFile objects of the same individual
+
+    Returns:
+        VariantFile: A file named after the first one, with all rows
+    """
+    data = pd.concat([vf.data for vf in group], ignore_index=True)
+    return VariantFile(group[0].file, data=data)
+
+
+def _entry(vf, duplicate_of, reason, action):
+    """
+    Build a report entry.
+
+    Returns:
+        dict: The entry, with file names
+    """
+    return {
+        COL_FILE: vf.name,
+        COL_DUPLICATE_OF: duplicate_of.name,
+        COL_REASON: reason,
+        COL_ACTION: action
+    }
@@ -1,13 +1,128 @@
+import hashlib
+import io
 import pandas as pd
+from openpyxl import load_workbook
 
-def read_excel_file(file):
+def read_excel_file(file, usecols=None):
     """
     Read an Excel file and return the DataFrame.
 
     Args:
         file: File object to read
+        usecols: Optional column selection passed to pandas, e.g. a callable
+                 receiving each column name
 
     Returns:
         pd.DataFrame: The data from the Excel file
     """
-    return pd.read_excel(file)
+    # Files may have been read before (e.g. by the validation pass)
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    return pd.read_excel(file, usecols=usecols)
+
+def read_excel_columns(file, columns):
+    """
+    Read only the header and the given columns of the first sheet.
+
+    Unlike read_excel_file, cells outside the requested columns are not
+    converted, which makes this much faster on wide sheets. Rows where all
+    the requested cells are empty are skipped. Legacy .xls files fall back
+    to pandas.
+
+    Args:
+        file: File object to read
+        columns (list): Column names to read
+
+    Returns:
+        pd.DataFrame: The columns found, in sheet order, indexed like
+                      read_excel_file (spreadsheet row - 2)
+    """
+    if str(getattr(file, "name", "")).lower().endswith(".xls"):
+        return read_excel_file(file, usecols=lambda col: col in columns)
+
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+
+        # Column positions of the requested columns, the first one wins if repeated
+        positions = {}
+        for position, name in enumerate(header):
+            if name in columns and name not in positions:
+                positions[name] = position
+
+        index = []
+        records = []
+        for row_number, row in enumerate(rows):
+            values = [row[position] if position < len(row) else None for position in positions.values()]
+            if any(value is not None for value in values):
+                index.append(row_number)
+                records.append(values)
+    finally:
+        workbook.close()
+
+    return pd.DataFrame(records, columns=list(positions), index=index)
+
+def content_hash(file):
+    """
+    Compute the SHA-256 hash of a file's contents.
+
+    Args:
+        file: File object to hash
+
+    Returns:
+        str: Hexadecimal digest
+    """
+    file.seek(0)
+    digest = hashlib.sha256(file.read()).hexdigest()
+    file.seek(0)
+    return digest
+
+def to_excel(df):
+    """
+    Convert a DataFrame to an Excel file.
+
+    Args:
+        df: The DataFrame to convert
+
+    Returns:
+        bytes: The Excel file as bytes
+    """
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name="Results")
+
+    # Seek to the beginning of the stream
+    output.seek(0)
+
+    return output.getvalue()
+
+def to_parquet(df):
+    """
+    Convert a DataFrame to a Parquet file.
+
+    Uses pyarrow, which is a dependency of the project.
+
+    Args:
+        df: The DataFrame to convert
+
+    Returns:
+        bytes: The Parquet file as bytes
+
+    Raises:
+        ImportError: If pyarrow is missing from the environment
+    """
+    # Code columns may mix integer codes with error messages, which Parquet can't store
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x))
+
+    output = io.BytesIO()
+    df.to_parquet(output, index=False)
+
+    return output.getvalue()
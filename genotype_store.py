@@ -0,0 +1,171 @@
+"""
+In-memory store of parsed input files with cached, filterable result tables.
+"""
+
+from collections import OrderedDict
+from sparse_genotypes import SparseGenotypeMatrix
+
+
+class QueryResult:
+    """Tables computed for one selection of RS IDs and individuals."""
+
+    def __init__(self, matrix, rows, rs_ids):
+        """
+        Materialize the codes and nucleotides tables for the selected sub-matrix.
+
+        Args:
+            matrix (SparseGenotypeMatrix): Genotypes of the whole cohort
+            rows (list): Row numbers of the selected individuals, in upload order
+            rs_ids (list): Selected RS IDs, in panel order
+        """
+        self.rs_ids = rs_ids
+        self.codes_table, self.case_matrix, self.code_type_matrix = matrix.codes_table(rows, rs_ids)
+        self.nucleotides_table, self.nucleotides_case_matrix = matrix.nucleotides_table(rows, rs_ids)
+        self._views = {}
+
+    def view(self, name, build):
+        """
+        Get a view derived from the tables, building it on first use.
+
+        Views (e.g. styled tables or export files) are kept with the result,
+        so a cached selection is displayed again without rebuilding them.
+
+        Args:
+            name (str): Name of the view
+            build: Function receiving this QueryResult and returning the view
+
+        Returns:
+            The view returned by build
+        """
+        if name not in self._views:
+            self._views[name] = build(self)
+        return self._views[name]
+
+
+class GenotypeStore:
+    # Maximum number of query results kept in memory
+    MAX_CACHED_QUERIES = 32
+
+    def __init__(self, rs_file, variant_files, duplicates_report=None):
+        """
+        Initialize a GenotypeStore object.
+
+        Args:
+            rs_file: A validated RSTotalesFile object
+            variant_files: List of VariantFile objects
+            duplicates_report (pd.DataFrame, optional): Duplicate files collapsed while loading
+        """
+        self.rs_file = rs_file
+        self.variant_files = variant_files
+        self.duplicates_report = duplicates_report
+        self._matrix = None
+        self._cache = OrderedDict()
+
+    def matrix(self):
+        """
+        Get the sparse genotypes of the whole cohort, building them on first use.
+
+        Returns:
+            SparseGenotypeMatrix: One row per variant file, one column per panel RS ID
+        """
+        if self._matrix is None:
+            self._matrix = SparseGenotypeMatrix(self.variant_files, self.rs_file.rs_data)
+        return self._matrix
+
+    def rs_ids(self):
+        """
+        Get all RS IDs in the panel.
+
+        Returns:
+            list: RS IDs in the order of the RS totales file
+        """
+        return list(self.rs_file.rs_data.keys())
+
+    def genes(self):
+        """
+        Get all gene tags present in the panel.
+
+        Returns:
+            list: Sorted unique gene tags
+        """
+        return sorted({data['gene'] for data in self.rs_file.rs_data.values() if data.get('gene')})
+
+    def individual_ids(self):
+        """
+        Get all individual IDs in the uploaded variant files.
+
+        Returns:
+            list: Individual IDs in upload order, without duplicates
+        """
+        return list(dict.fromkeys(vf.individual_id() for vf in self.variant_files))
+
+    def select_rs_ids(self, rs_ids=None, genes=None):
+        """
+        Resolve an RS ID list and/or gene tags to the matching panel RS IDs.
+
+        RS IDs are matched case-insensitively. When both filters are given,
+        an RS ID is selected if it matches either of them.
+
+        Args:
+            rs_ids (list, optional): RS IDs to select
+            genes (list, optional): Gene tags whose RS IDs should be selected
+
+        Returns:
+            list: Selected RS IDs, in panel order
+        """
+        if not rs_ids and not genes:
+            return self.rs_ids()
+
+        wanted_rs = {str(rs_id).strip().lower() for rs_id in rs_ids or []}
+        wanted_genes = set(genes or [])
+
+        return [
+            rs_id for rs_id, data in self.rs_file.rs_data.items()
+            if rs_id.lower() in wanted_rs or data.get('gene') in wanted_genes
+        ]
+
+    def select_rows(self, individual_ids=None):
+        """
+        Select the matrix rows of the variant files belonging to the given individuals.
+
+        Args:
+            individual_ids (list, optional): Individual IDs to select
+
+        Returns:
+            list: Selected row numbers, in upload order
+        """
+        if not individual_ids:
+            return list(range(len(self.variant_files)))
+
+        wanted = {str(individual_id) for individual_id in individual_ids}
+        return [row for row, vf in enumerate(self.variant_files) if vf.individual_id() in wanted]
+
+    def query(self, rs_ids=None, genes=None, individual_ids=None):
+        """
+        Get the result tables for a selection, materializing only the selected cells.
+
+        Results are cached per selection, so repeating a query is immediate.
+
+        Args:
+            rs_ids (list, optional): RS IDs to include
+            genes (list, optional): Gene tags whose RS IDs should be included
+            individual_ids (list, optional): Individual IDs to include
+
+        Returns:
+            QueryResult: The tables for the selected sub-matrix
+        """
+        selected_rs_ids = self.select_rs_ids(rs_ids, genes)
+        selected_rows = self.select_rows(individual_ids)
+
+        key = (tuple(selected_rs_ids), tuple(selected_rows))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        result = QueryResult(self.matrix(), selected_rows, selected_rs_ids)
+
+        self._cache[key] = result
+        if len(self._cache) > self.MAX_CACHED_QUERIES:
+            self._cache.popitem(last=False)
+
+        return result
@@ -0,0 +1,115 @@
+"""
+Builders for the codes and nucleotides tables shown in the application.
+
+These cell-by-cell builders are the reference implementation. The app renders
+the tables from a SparseGenotypeMatrix, which must produce the same cells.
+"""
+
+import pandas as pd
+from translations import SPANISH as T
+
+def create_statistics_table(variant_files, rs_reference_values):
+    """
+    Create a statistics table with individual IDs and RS values as columns.
+    Each individual has TWO rows, one for each allele.
+    Also create a case matrix for styling and a code_type_matrix to track reference vs variant.
+
+    Args:
+        variant_files: List of VariantFile objects
+        rs_reference_values: Dictionary with RS values as keys and allele codes as values
+
+    Returns:
+        tuple: (stats_df, case_matrix, code_type_matrix)
+    """
+    # Create rows for each individual (two rows per individual)
+    statistics = []
+    for vf in variant_files:
+        # Add two rows for this individual
+        individual_id = vf.individual_id()
+        statistics.append({T["individual_column"]: individual_id})
+        statistics.append({T["individual_column"]: individual_id})
+
+    # Create the initial DataFrame
+    stats_df = pd.DataFrame(statistics)
+
+    # Create a dataframe to store cases (one case per individual)
+    num_individuals = len(variant_files)
+    case_matrix = pd.DataFrame(index=range(num_individuals * 2), columns=rs_reference_values.keys())
+
+    # Create a dataframe to store code types (reference vs variant)
+    code_type_matrix = pd.DataFrame(index=range(num_individuals * 2), columns=rs_reference_values.keys())
+
+    # For each variant file and each RS value, find the data
+    for i, vf in enumerate(variant_files):
+        for rs_id in rs_reference_values.keys():
+            # Get the case for this RS ID (same for both rows)
+            case = vf.get_sequence_case(rs_id, rs_reference_values)
+
+            # Set case for both rows of this individual
+            case_matrix.at[i*2, rs_id] = case
+            case_matrix.at[i*2+1, rs_id] = case
+
+            # Get the sequence value for this RS ID for each position
+            first_code = vf.sequence_for(rs_id, rs_reference_values, 0)
+            second_code = vf.sequence_for(rs_id, rs_reference_values, 1)
+
+            # Set values in corresponding rows - ensure they're stored as integers if numeric
+            stats_df.at[i*2, rs_id] = first_code
+            stats_df.at[i*2+1, rs_id] = second_code
+
+            # Record if code is reference (True) or variant (False)
+            rs_codes = rs_reference_values[rs_id]
+            code_type_matrix.at[i*2, rs_id] = (first_code == rs_codes['ref_code'])
+            code_type_matrix.at[i*2+1, rs_id] = (second_code == rs_codes['ref_code'])
+
+    # Convert numeric columns to integers where appropriate
+    convert_code_columns(stats_df)
+
+    return stats_df, case_matrix, code_type_matrix
+
+def convert_code_columns(stats_df):
+    """
+    Convert the code columns of a statistics table to integers where appropriate, in place.
+
+    Every numeric code becomes an integer, also in columns that contain error
+    messages, so codes are exported as e.g. 101 and never as 101.0.
+
+    Args:
+        stats_df: The statistics table
+    """
+    for col in stats_df.columns:
+        if col != T["individual_column"]:
+            stats_df[col] = stats_df[col].apply(lambda x: int(float(x)) if pd.notna(x) and str(x).replace('.', '', 1).isdigit() else x)
+
+def create_nucleotides_table(variant_files, rs_data):
+    """
+    Create a table with nucleotides instead of codes, with one row per individual.
+    Uses the nucleotide_pair method of VariantFile to get concatenated nucleotide pairs.
+
+    Args:
+        variant_files: List of VariantFile objects
+        rs_data: Dictionary with RS IDs as keys and all related data as values
+
+    Returns:
+        tuple: (nucl_df, nuc_case_matrix) - The nucleotides table and its case matrix
+    """
+    # Initialize dict with Individual column
+    statistics = [{T["individual_column"]: vf.individual_id()} for vf in variant_files]
+
+    # Create the initial DataFrame
+    nucl_df = pd.DataFrame(statistics)
+
+    # Create a case matrix for styling (one case per individual)
+    nuc_case_matrix = pd.DataFrame(index=range(len(variant_files)), columns=rs_data.keys())
+
+    # For each variant file and each RS value, get the nucleotide pair and case
+    for i, vf in enumerate(variant_files):
+        for rs_id in rs_data.keys():
+            # Get the case for this RS ID
+            case = vf.get_sequence_case(rs_id, rs_data)
+            nuc_case_matrix.at[i, rs_id] = case
+
+            # Get the nucleotide pair for this RS ID
+            nucl_df.at[i, rs_id] = vf.nucleotide_pair(rs_id, rs_data)
+
+    return nucl_df, nuc_case_matrix
@@ -1,10 +1,18 @@
 import streamlit as st
 import pandas as pd
-import io
+from file_utils import to_excel
 from variant_file import VariantFile
-from rs_totales_file import RSTotalesFile
+from validation import validate_files, has_errors, COL_SEVERITY, COL_ISSUE
+from deduplication import POLICIES, POLICY_FLAG, COL_REASON, COL_ACTION
+from processing import process_uploads, ProcessingError
+from profiling import profile_run, profiling_enabled_from_env, ProfilerBusyError
 from translations import SPANISH as T
 
+# Session state key holding the GenotypeStore of the last processed submission
+STORE_SESSION_KEY = "genotype_store"
+# Session state key holding the ProfileResult of the last profiled submission
+PROFILE_SESSION_KEY = "profile_result"
+
 # Set the page to wide mode at the very beginning
 st.set_page_config(
     page_title=T["app_title"],
@@ -15,18 +23,71 @@ def main():
     st.title(T["app_title"])
 
     # Display file upload interface
-    rs_totales_file, variant_tables_files = display_file_inputs()
-
-    # Submit button
-    if st.button(T["submit_button"]):
+    rs_totales_file, variant_tables_files, duplicate_policy = display_file_inputs()
+
+    # Validate and submit buttons, and profiling toggle
+    button_cols = st.columns([1, 1, 4])
+    with button_cols[0]:
+        validate_clicked = st.button(T["validate_button"])
+    with button_cols[1]:
+        submit_clicked = st.button(T["submit_button"])
+    with button_cols[2]:
+        profile_enabled = st.toggle(T["profile_toggle"], value=profiling_enabled_from_env(), help=T["profile_hint"])
+
+    results_displayed = False
+    if validate_clicked or submit_clicked:
         if rs_totales_file is None or not variant_tables_files:
             st.error(T["please_upload_error"])
         else:
-            # Process files and display results
-            process_files(rs_totales_file, variant_tables_files)
+            # Drop results and profile from a previous submission
+            st.session_state.pop(STORE_SESSION_KEY, None)
+            st.session_state.pop(PROFILE_SESSION_KEY, None)
+
+            if submit_clicked and profile_enabled:
+                # Profile the whole run on the real upload, including rendering the results
+                try:
+                    with profile_run() as profile:
+                        results_displayed = submit_files(rs_totales_file, variant_tables_files, duplicate_policy, True)
+                    st.session_state[PROFILE_SESSION_KEY] = profile
+                except ProfilerBusyError:
+                    # Only one run can be profiled at a time; process this one without profiling
+                    st.warning(T["profile_busy"])
+                    results_displayed = submit_files(rs_totales_file, variant_tables_files, duplicate_policy, True)
+            else:
+                results_displayed = submit_files(rs_totales_file, variant_tables_files, duplicate_policy, submit_clicked)
+
+    # Display results for the current filters, reusing the loaded files across reruns
+    store = st.session_state.get(STORE_SESSION_KEY)
+    if store is not None and not results_displayed:
+        display_results(store)
+
+    # Offer the profile of the last profiled submission
+    profile = st.session_state.get(PROFILE_SESSION_KEY)
+    if profile is not None:
+        display_profile_downloads(profile)
+
+def submit_files(rs_totales_file, variant_tables_files, duplicate_policy, process):
+    """
+    Validate the files and, if requested and valid, process them and display the results.
+
+    Returns:
+        bool: True if the results were displayed
+    """
+    # Only validate, reporting every problem up front
+    if not process:
+        run_validation(rs_totales_file, variant_tables_files)
+        return False
+
+    # Validation and loading run in the processing core shared with the API
+    store = process_files(rs_totales_file, variant_tables_files, duplicate_policy)
+    if store is None:
+        return False
+
+    display_results(store)
+    return True
 
 def display_file_inputs():
-    """Display the file upload sections and return the uploaded files"""
+    """Display the file upload sections and return the uploaded files and duplicate policy"""
     # First input for single file
     st.subheader(T["input_files_header"])
     rs_totales_file = st.file_uploader(T["rs_totales_label"], type=["xlsx", "xls"])
@@ -40,176 +101,160 @@ def display_file_inputs():
     # Add separate hint about filename format
     st.caption(T["filename_hint"])
 
-    return rs_totales_file, variant_tables_files
+    # How to handle several files of the same individual
+    duplicate_policy = st.selectbox(
+        T["duplicate_policy_label"],
+        POLICIES,
+        format_func=lambda policy: T["duplicate_policies"][policy]
+    )
 
-def process_files(rs_totales_file, variant_tables_files):
-    """Process the uploaded files and display results"""
-    # Show spinner while processing
-    with st.spinner(T["processing_spinner"]):
-        try:
-            # Load and validate files
-            rs_file, variant_files = load_and_validate_files(rs_totales_file, variant_tables_files)
-            if rs_file is None:
-                return
+    return rs_totales_file, variant_tables_files, duplicate_policy
 
-            # Generate data tables
-            codes_table, case_matrix, code_type_matrix = create_statistics_table(variant_files, rs_file.rs_data)
-            nucleotides_table, nucleotides_case_matrix = create_nucleotides_table(variant_files, rs_file.rs_data)
+def run_validation(rs_totales_file, variant_tables_files):
+    """
+    Run the fast validation pass and display its report.
 
-            # Store the nucleotides case matrix as an attribute for later use
-            process_files.nucleotides_case_matrix = nucleotides_case_matrix
+    Returns:
+        bool: True if no blocking errors were found
+    """
+    with st.spinner(T["validation_spinner"]):
+        report = validate_files(rs_totales_file, variant_tables_files)
 
-            # Display statistics
-            all_dfs = [rs_file.data] + [vf.data for vf in variant_files]
-            total_rows = count_total_rows(all_dfs)
-            st.success(T["processing_complete"])
-            st.metric(T["total_rows_parsed"], total_rows)
+    return display_validation_outcome(report)
 
-            # Create and display tabs for different views
-            display_tabbed_results(codes_table, case_matrix, code_type_matrix, nucleotides_table)
+def display_validation_outcome(report):
+    """
+    Display the outcome of the validation pass and its report.
 
+    Returns:
+        bool: True if no blocking errors were found
+    """
+    if report.empty:
+        st.success(T["validation_ok"])
+        return True
+
+    errors_found = has_errors(report)
+    if errors_found:
+        st.error(T["validation_errors"].format(len(report)))
+    else:
+        st.warning(T["validation_warnings"].format(len(report)))
+
+    display_validation_report(report)
+    return not errors_found
+
+def display_validation_report(report):
+    """Display the validation report with translated headers and values"""
+    translated_report = report.replace({
+        COL_SEVERITY: T["validation_severities"],
+        COL_ISSUE: T["validation_issues"]
+    }).rename(columns=T["validation_report_columns"])
+
+    st.dataframe(translated_report, hide_index=True)
+    display_download_buttons(export_files(translated_report), "validation_report")
+
+def process_files(rs_totales_file, variant_tables_files, duplicate_policy=POLICY_FLAG):
+    """
+    Validate and load the uploaded files with the shared processing core,
+    display the validation report and keep the files in the session for querying.
+
+    Returns:
+        GenotypeStore: The loaded files, or None if they could not be processed
+    """
+    # Show spinner while processing
+    with st.spinner(T["processing_spinner"]):
+        try:
+            store, validation_report = process_uploads(rs_totales_file, variant_tables_files, duplicate_policy)
+        except ProcessingError as e:
+            # Validation errors are shown in the report, other errors as a message
+            if e.validation_report is not None:
+                display_validation_outcome(e.validation_report)
+            if e.validation_report is None or not has_errors(e.validation_report):
+                st.error(str(e))
+            return None
         except ValueError as e:
             st.error(T["error_processing"].format(str(e)))
+            return None
 
-# Initialize the attribute to store the nucleotides case matrix
-process_files.nucleotides_case_matrix = None
-
-def load_and_validate_files(rs_totales_file, variant_tables_files):
-    """Load and validate all input files"""
-    # Process the RS totales file
-    rs_file = RSTotalesFile(rs_totales_file)
+    display_validation_outcome(validation_report)
 
-    if not rs_file.is_valid():
-        st.error(rs_file.error)
-        return None, None
+    # Keep the parsed files so filter changes don't reprocess the uploads
+    st.session_state[STORE_SESSION_KEY] = store
+    return store
 
-    # Process variant files
-    variant_files = [VariantFile(file) for file in variant_tables_files]
-
-    return rs_file, variant_files
+def count_total_rows(dataframes):
+    """Count total rows across all dataframes."""
+    return sum(len(df) for df in dataframes if df is not None)
 
-def create_statistics_table(variant_files, rs_reference_values):
-    """
-    Create a statistics table with individual IDs and RS values as columns.
-    Each individual has TWO rows, one for each allele.
-    Also create a case matrix for styling and a code_type_matrix to track reference vs variant.
+def display_results(store):
+    """Display processing statistics, the query filters and the filtered results"""
+    # Display statistics
+    all_dfs = [store.rs_file.data] + [vf.data for vf in store.variant_files]
+    total_rows = count_total_rows(all_dfs)
+    st.success(T["processing_complete"])
+    st.metric(T["total_rows_parsed"], total_rows)
 
-    Args:
-        variant_files: List of VariantFile objects
-        rs_reference_values: Dictionary with RS values as keys and allele codes as values
+    # Report the duplicate files that were collapsed or flagged
+    if store.duplicates_report is not None and not store.duplicates_report.empty:
+        display_duplicates_report(store.duplicates_report)
 
-    Returns:
-        tuple: (stats_df, case_matrix, code_type_matrix)
-    """
-    # Create rows for each individual (two rows per individual)
-    statistics = []
-    for vf in variant_files:
-        # Add two rows for this individual
-        individual_id = vf.individual_id()
-        statistics.append({T["individual_column"]: individual_id})
-        statistics.append({T["individual_column"]: individual_id})
-
-    # Create the initial DataFrame
-    stats_df = pd.DataFrame(statistics)
-
-    # Create a dataframe to store cases (one case per individual)
-    num_individuals = len(variant_files)
-    case_matrix = pd.DataFrame(index=range(num_individuals * 2), columns=rs_reference_values.keys())
-
-    # Create a dataframe to store code types (reference vs variant)
-    code_type_matrix = pd.DataFrame(index=range(num_individuals * 2), columns=rs_reference_values.keys())
-
-    # For each variant file and each RS value, find the data
-    for i, vf in enumerate(variant_files):
-        for rs_id in rs_reference_values.keys():
-            # Get the case for this RS ID (same for both rows)
-            case = vf.get_sequence_case(rs_id, rs_reference_values)
-
-            # Set case for both rows of this individual
-            case_matrix.at[i*2, rs_id] = case
-            case_matrix.at[i*2+1, rs_id] = case
-
-            # Get the sequence value for this RS ID for each position
-            first_code = vf.sequence_for(rs_id, rs_reference_values, 0)
-            second_code = vf.sequence_for(rs_id, rs_reference_values, 1)
-
-            # Set values in corresponding rows - ensure they're stored as integers if numeric
-            stats_df.at[i*2, rs_id] = first_code
-            stats_df.at[i*2+1, rs_id] = second_code
-
-            # Record if code is reference (True) or variant (False)
-            rs_codes = rs_reference_values[rs_id]
-            code_type_matrix.at[i*2, rs_id] = (first_code == rs_codes['ref_code'])
-            code_type_matrix.at[i*2+1, rs_id] = (second_code == rs_codes['ref_code'])
-
-    # Convert numeric columns to integers where appropriate
-    for col in stats_df.columns:
-        if col != T["individual_column"]:
-            # Check if all non-null values in this column are numeric
-            if stats_df[col].dropna().apply(lambda x: str(x).replace('.', '', 1).isdigit()).all():
-                stats_df[col] = stats_df[col].apply(lambda x: int(float(x)) if pd.notna(x) and str(x).replace('.', '', 1).isdigit() else x)
-
-    return stats_df, case_matrix, code_type_matrix
-
-def create_nucleotides_table(variant_files, rs_data):
-    """
-    Create a table with nucleotides instead of codes, with one row per individual.
-    Uses the nucleotide_pair method of VariantFile to get concatenated nucleotide pairs.
+    # Only the selected sub-matrix is computed; repeated selections hit the cache
+    rs_ids, genes, individual_ids = display_query_filters(store)
+    with st.spinner(T["processing_spinner"]):
+        result = store.query(rs_ids=rs_ids, genes=genes, individual_ids=individual_ids)
 
-    Args:
-        variant_files: List of VariantFile objects
-        rs_data: Dictionary with RS IDs as keys and all related data as values
+    # Create and display tabs for different views
+    display_tabbed_results(result)
 
-    Returns:
-        tuple: (nucl_df, nuc_case_matrix) - The nucleotides table and its case matrix
-    """
-    # Initialize dict with Individual column
-    statistics = [{T["individual_column"]: vf.individual_id()} for vf in variant_files]
+def display_duplicates_report(report):
+    """Display the duplicate files report with translated headers and values"""
+    translated_report = report.replace({
+        COL_REASON: T["duplicate_reasons"],
+        COL_ACTION: T["duplicate_actions"]
+    }).rename(columns=T["duplicate_report_columns"])
 
-    # Create the initial DataFrame
-    nucl_df = pd.DataFrame(statistics)
+    st.info(T["duplicates_found"].format(len(report)))
+    st.dataframe(translated_report, hide_index=True)
 
-    # Create a case matrix for styling (one case per individual)
-    nuc_case_matrix = pd.DataFrame(index=range(len(variant_files)), columns=rs_data.keys())
+def display_query_filters(store):
+    """Display the RS ID, gene and individual filters and return the selections"""
+    st.subheader(T["filters_header"])
+    st.caption(T["filters_hint"])
+    filter_cols = st.columns(3)
 
-    # For each variant file and each RS value, get the nucleotide pair and case
-    for i, vf in enumerate(variant_files):
-        for rs_id in rs_data.keys():
-            # Get the case for this RS ID
-            case = vf.get_sequence_case(rs_id, rs_data)
-            nuc_case_matrix.at[i, rs_id] = case
+    with filter_cols[0]:
+        rs_ids = st.multiselect(T["filter_rs_ids_label"], store.rs_ids())
 
-            # Get the nucleotide pair for this RS ID
-            nucl_df.at[i, rs_id] = vf.nucleotide_pair(rs_id, rs_data)
+    with filter_cols[1]:
+        genes = st.multiselect(T["filter_genes_label"], store.genes(), disabled=not store.genes())
 
-    return nucl_df, nuc_case_matrix
+    with filter_cols[2]:
+        individual_ids = st.multiselect(T["filter_individuals_label"], store.individual_ids())
 
-def count_total_rows(dataframes):
-    """Count total rows across all dataframes."""
-    return sum(len(df) for df in dataframes if df is not None)
+    return rs_ids, genes, individual_ids
 
-def display_tabbed_results(codes_table, case_matrix, code_type_matrix, nucleotides_table):
-    """Display results in tabbed interface"""
+def display_tabbed_results(result):
+    """Display the tables of a QueryResult in tabbed interface"""
     # Create tabs for the two different views
     tab1, tab2 = st.tabs([T["codes_tab"], T["nucleotides_tab"]])
 
     with tab1:
-        display_codes_tab(codes_table, case_matrix, code_type_matrix)
+        display_codes_tab(result)
 
     with tab2:
-        # Get the nucleotides case matrix from the nucleotides table creator
-        nucleotides_case_matrix = process_files.nucleotides_case_matrix
-        display_nucleotides_tab(nucleotides_table, nucleotides_case_matrix)
+        display_nucleotides_tab(result)
 
-def display_codes_tab(codes_table, case_matrix, code_type_matrix):
+def display_codes_tab(result):
     """Display the codes table tab content"""
-    # Display the codes table with styling
+    # Styling and exports are built once per selection and reused on every rerun
     st.subheader(T["codes_table_header"])
-    styled_codes_df = style_dataframe(codes_table, case_matrix, code_type_matrix)
+    styled_codes_df = result.view(
+        "styled_codes",
+        lambda r: style_dataframe(r.codes_table, r.case_matrix, r.code_type_matrix)
+    )
     st.dataframe(styled_codes_df, hide_index=True)
 
     # Display download buttons
-    display_download_buttons(codes_table, "variant_codes_table")
+    display_download_buttons(result.view("codes_files", lambda r: export_files(r.codes_table)), "variant_codes_table")
 
     # Display color legend
     st.markdown(f"""
@@ -265,17 +310,23 @@ def style_dataframe(df, case_matrix, code_type_matrix):
     # Apply the style matrix to the dataframe
     return styled_df.style.apply(lambda _: style_matrix, axis=None)
 
-def display_nucleotides_tab(nucleotides_table, nucleotides_case_matrix):
+def display_nucleotides_tab(result):
     """Display the nucleotides table tab content"""
     # Display the nucleotides table with styling
     st.subheader(T["nucleotides_table_header"])
 
-    # Apply styling to the nucleotides table
-    styled_nucleotides_df = style_nucleotides_table(nucleotides_table, nucleotides_case_matrix)
+    # Styling and exports are built once per selection and reused on every rerun
+    styled_nucleotides_df = result.view(
+        "styled_nucleotides",
+        lambda r: style_nucleotides_table(r.nucleotides_table, r.nucleotides_case_matrix)
+    )
     st.dataframe(styled_nucleotides_df, hide_index=True)
 
     # Display download buttons
-    display_download_buttons(nucleotides_table, "variant_nucleotides_table")
+    display_download_buttons(
+        result.view("nucleotides_files", lambda r: export_files(r.nucleotides_table)),
+        "variant_nucleotides_table"
+    )
 
 def style_nucleotides_table(df, case_matrix):
     """
@@ -314,49 +365,66 @@ def style_nucleotides_table(df, case_matrix):
     # Apply the style matrix to the dataframe
     return styled_df.style.apply(lambda _: style_matrix, axis=None)
 
-def display_download_buttons(df, base_filename):
-    """Display CSV and Excel download buttons for a dataframe"""
+def display_profile_downloads(profile):
+    """Display the profile of a run with pstats and collapsed-stack download buttons"""
+    st.subheader(T["profile_header"])
+    st.caption(T["profile_download_hint"])
+    download_cols = st.columns([1, 1, 4])
+
+    with download_cols[0]:
+        st.download_button(
+            label=T["download_button_pstats"],
+            data=profile.pstats_data,
+            file_name="profile.pstats",
+            mime="application/octet-stream"
+        )
+
+    with download_cols[1]:
+        st.download_button(
+            label=T["download_button_flamegraph"],
+            data=profile.collapsed_stacks,
+            file_name="profile.collapsed.txt",
+            mime="text/plain"
+        )
+
+    with st.expander(T["profile_summary_expander"]):
+        st.code(profile.summary)
+
+def export_files(df):
+    """
+    Build the CSV and Excel downloads of a dataframe.
+
+    Returns:
+        tuple: (csv_data, excel_data)
+    """
+    return df.to_csv(index=False), to_excel(df)
+
+def display_download_buttons(files, base_filename):
+    """Display CSV and Excel download buttons for the files returned by export_files"""
     st.write(T["download_options"])
     download_cols = st.columns([1, 1, 4])
+    csv_data, excel_data = files
 
     # CSV Download button
-    csv_data = df.to_csv(index=False)
     with download_cols[0]:
         st.download_button(
             label=T["download_button_csv"],
             data=csv_data,
             file_name=f"{base_filename}.csv",
-            mime="text/csv"
+            mime="text/csv",
+            # Downloading doesn't change anything, so don't rerun the app
+            on_click="ignore"
         )
 
     # Excel Download button
-    excel_data = to_excel(df)
     with download_cols[1]:
         st.download_button(
             label=T["download_button_excel"],
             data=excel_data,
             file_name=f"{base_filename}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore"
         )
 
-def to_excel(df):
-    """
-    Convert a DataFrame to an Excel file.
-
-    Args:
-        df: The DataFrame to convert
-
-    Returns:
-        bytes: The Excel file as bytes
-    """
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name="Results")
-
-    # Seek to the beginning of the stream
-    output.seek(0)
-
-    return output.getvalue()
-
 if __name__ == "__main__":
     main()
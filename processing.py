@@ -0,0 +1,55 @@
+"""
+Processing core shared by the Streamlit app and the HTTP API.
+
+Runs validation, loading with duplicate handling and building the genotype
+store, without any UI.
+"""
+
+from rs_totales_file import RSTotalesFile
+from genotype_store import GenotypeStore
+from validation import validate_files, has_errors
+from deduplication import load_variant_files, POLICY_FLAG
+
+
+class ProcessingError(ValueError):
+    def __init__(self, message, validation_report=None):
+        """
+        Initialize a ProcessingError.
+
+        Args:
+            message (str): Description of the error
+            validation_report (pd.DataFrame, optional): The validation report, if validation failed
+        """
+        super().__init__(message)
+        self.validation_report = validation_report
+
+
+def process_uploads(rs_totales_file, variant_tables_files, duplicate_policy=POLICY_FLAG, parallel_validation=True):
+    """
+    Validate and load the input files.
+
+    Args:
+        rs_totales_file: File object of the RS totales file
+        variant_tables_files: List of variant table file objects
+        duplicate_policy (str): Policy for files of the same individual
+        parallel_validation (bool): False to validate in this process, e.g. when
+                                    already running in a worker process
+
+    Returns:
+        tuple: (store, validation_report) - the GenotypeStore to query and the
+               validation warnings
+
+    Raises:
+        ProcessingError: If the files have blocking errors
+    """
+    validation_report = validate_files(rs_totales_file, variant_tables_files, parallel=parallel_validation)
+    if has_errors(validation_report):
+        raise ProcessingError("The input files have validation errors", validation_report)
+
+    rs_file = RSTotalesFile(rs_totales_file)
+    if not rs_file.is_valid():
+        raise ProcessingError(rs_file.error, validation_report)
+
+    variant_files, duplicates_report = load_variant_files(variant_tables_files, duplicate_policy)
+
+    return GenotypeStore(rs_file, variant_files, duplicates_report), validation_report
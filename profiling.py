@@ -0,0 +1,184 @@
+"""
+Opt-in profiling of a processing run.
+
+A run is profiled with cProfile, for pstats output, and with a sampling
+thread that records the call stack of the profiled thread at a fixed
+interval, for collapsed-stack output that flamegraph tools (flamegraph.pl,
+speedscope, ...) can read.
+
+Since Python 3.12 cProfile is process-wide: the pstats output also covers
+other threads running at the same time (e.g. other Streamlit sessions), and
+only one profiler can be active at once. Runs are therefore profiled one at
+a time; profile_run raises ProfilerBusyError while another profile is active.
+
+On 3.12+ cProfile also keeps a single call stack for every thread, so calls
+made by another thread cut short the timings of the profiled functions. The
+sampler thread only makes builtin calls while the profiler is on, and
+builtins aren't profiled there. Timings are still unreliable if other
+threads run Python code during the profile.
+
+Profiling is enabled with the UI toggle, or for the HTTP API by setting the
+SEQUENCE_EXTRACTOR_PROFILE environment variable to 1.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Environment variable enabling profiling outside the UI
+PROFILE_ENV_VAR = "SEQUENCE_EXTRACTOR_PROFILE"
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Functions listed in the text summary
+SUMMARY_LIMIT = 40
+
+
+def profiling_enabled_from_env():
+    """
+    Check if profiling is enabled with the environment variable.
+
+    Returns:
+        bool: True if the variable is set to 1, true or yes
+    """
+    return os.environ.get(PROFILE_ENV_VAR, "").strip().lower() in ("1", "true", "yes")
+
+
+# Held while a run is being profiled, as only one profiler can be active per process
+_PROFILE_LOCK = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when another run, or another profiling tool, is already profiling the process."""
+
+
+class ProfileResult:
+    """Profile data of a run, filled in when the profiled block ends."""
+
+    def __init__(self):
+        self.pstats_data = None
+        self.collapsed_stacks = None
+        self.summary = None
+
+
+@contextmanager
+def profile_run(sample_interval=DEFAULT_SAMPLE_INTERVAL):
+    """
+    Profile the code run inside the block.
+
+    The collapsed stacks only sample the current thread, but on Python 3.12+
+    the pstats data covers every thread of the process, and builtin
+    functions are left out of it.
+
+    Usage:
+        with profile_run() as profile:
+            ...
+        profile.pstats_data  # Bytes loadable with pstats (e.g. snakeviz)
+
+    Args:
+        sample_interval (float): Seconds between stack samples
+
+    Yields:
+        ProfileResult: Filled in when the block ends
+
+    Raises:
+        ProfilerBusyError: If a profile is already active, before the block runs
+    """
+    if not _PROFILE_LOCK.acquire(blocking=False):
+        raise ProfilerBusyError("Another run is already being profiled")
+
+    try:
+        result = ProfileResult()
+        # On 3.12+ the sampler's builtin calls would land on the profiled call stack
+        profiler = cProfile.Profile(builtins=sys.version_info < (3, 12))
+        # Started before the profiler, so that starting the thread isn't profiled
+        sampler = _StackSampler(threading.get_ident(), sample_interval)
+        sampler.start()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            sampler.stop()
+            # Another profiling tool (e.g. a debugger or an outer cProfile) is active
+            raise ProfilerBusyError(str(e)) from e
+
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            sampler.stop()
+
+            profiler.create_stats()
+            result.pstats_data = marshal.dumps(profiler.stats)
+            result.collapsed_stacks = sampler.collapsed_stacks()
+            result.summary = _summary(profiler)
+    finally:
+        _PROFILE_LOCK.release()
+
+
+def _summary(profiler):
+    """Format the most expensive functions by cumulative time."""
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(SUMMARY_LIMIT)
+    return output.getvalue()
+
+
+class _StackSampler:
+    def __init__(self, thread_id, interval):
+        """
+        Initialize a sampler of another thread's call stack.
+
+        Args:
+            thread_id (int): Identifier of the thread to sample
+            interval (float): Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self._counts = {}
+        # A plain flag, as waiting on an Event makes Python calls
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def collapsed_stacks(self):
+        """
+        Get the samples in collapsed-stack format.
+
+        Returns:
+            str: One 'outer;...;inner count' line per distinct stack
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in Counter(self._counts).most_common())
+
+    def _run(self):
+        # Only builtin calls in the loop, which the profiler leaves out (see profile_run)
+        counts = self._counts
+        sleep = time.sleep
+        current_frames = sys._current_frames
+        separator = os.sep
+        while True:
+            sleep(self.interval)
+            if self._stopped:
+                break
+            frame = current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rpartition(separator)[2]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
@@ -8,6 +8,7 @@ class RSTotalesFile:
     COL_CODIGO_REFERENCE = 'Codigo reference allele'
     COL_VARIANT_ALLELE = 'Variant Allele'
     COL_CODIGO_VARIANT = 'Codigo variant allele'
+    COL_GENE = 'Gene'  # Optional column used to tag RS IDs with their gene
 
     def __init__(self, file):
         """
@@ -83,16 +84,37 @@ class RSTotalesFile:
             var_code = self._format_code(self.data.at[index, self.COL_CODIGO_VARIANT])
             ref_allele = self.data.at[index, self.COL_REFERENCE_ALLELE]
             var_allele = self.data.at[index, self.COL_VARIANT_ALLELE]
+            gene = self._gene_for(index)
 
             rs_data[rs_id] = {
                 'ref_code': ref_code,
                 'var_code': var_code,
                 'ref_allele': ref_allele,
-                'var_allele': var_allele
+                'var_allele': var_allele,
+                'gene': gene
             }
 
         return rs_data, None
 
+    def _gene_for(self, index):
+        """
+        Get the gene tag for a row, if the optional gene column is present.
+
+        Args:
+            index: The row index in the dataframe
+
+        Returns:
+            str or None: The stripped gene tag, or None if missing
+        """
+        if self.COL_GENE not in self.data.columns:
+            return None
+
+        gene = self.data.at[index, self.COL_GENE]
+        if pd.isna(gene):
+            return None
+
+        return str(gene).strip() or None
+
     def _format_code(self, code):
         """
         Format a code value to an integer if it's a number.
@@ -0,0 +1,187 @@
+"""
+Sparse storage of cohort genotypes.
+
+Most cells of the result tables are the reference genotype, because an
+individual's variant table only contains a small fraction of the panel RS IDs.
+The matrix below stores only those variant calls and treats reference as the
+implicit default, so memory and compute scale with the number of calls. Dense
+tables are only materialized for the selection that is rendered or exported.
+"""
+
+import numpy as np
+import pandas as pd
+from genotype_tables import convert_code_columns
+from variant_file import VariantFile
+from translations import SPANISH as T
+
+
+class SparseGenotypeMatrix:
+    def __init__(self, variant_files, rs_data):
+        """
+        Initialize a SparseGenotypeMatrix object.
+
+        Rows are individuals and columns are the panel RS IDs. The calls are
+        kept in CSR layout: the calls of row i are at positions
+        indptr[i]:indptr[i + 1] of indices (column numbers) and values
+        (processed variant frequencies).
+
+        Args:
+            variant_files: List of VariantFile objects, one row each
+            rs_data: Dictionary with RS IDs as keys and all related data as values
+        """
+        self.rs_data = rs_data
+        self.rs_ids = list(rs_data.keys())
+        self.individual_ids = [vf.individual_id() for vf in variant_files]
+        self._column_of = {rs_id: j for j, rs_id in enumerate(self.rs_ids)}
+
+        indptr = [0]
+        indices = []
+        values = []
+        # Files sharing parsed data (e.g. identical uploads) are resolved once
+        resolved = {}
+        for vf in variant_files:
+            if id(vf.data) not in resolved:
+                resolved[id(vf.data)] = vf.frequency_values(self.rs_ids)
+            frequency_values = resolved[id(vf.data)]
+            columns = sorted(self._column_of[rs_id] for rs_id in frequency_values)
+
+            indices.extend(columns)
+            values.extend(frequency_values[self.rs_ids[j]] for j in columns)
+            indptr.append(len(indices))
+
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int32)
+        self.values = np.array(values, dtype=object)
+
+    @property
+    def shape(self):
+        """tuple: (number of individuals, number of RS IDs)"""
+        return len(self.individual_ids), len(self.rs_ids)
+
+    @property
+    def num_calls(self):
+        """int: Number of stored (non-reference) cells"""
+        return len(self.indices)
+
+    def codes_table(self, rows=None, rs_ids=None):
+        """
+        Materialize the codes table for a selection, with two rows per individual.
+
+        Produces the same tables as genotype_tables.create_statistics_table.
+
+        Args:
+            rows (list, optional): Row numbers of the individuals to include, default all
+            rs_ids (list, optional): RS IDs to include, default all
+
+        Returns:
+            tuple: (stats_df, case_matrix, code_type_matrix)
+        """
+        rows, rs_ids = self._resolve_selection(rows, rs_ids)
+        num_rows = len(rows) * 2
+
+        # Start every column at the reference genotype
+        code_columns = []
+        case_columns = []
+        code_type_columns = []
+        for rs_id in rs_ids:
+            ref_code = self.rs_data[rs_id]['ref_code']
+            code_columns.append([ref_code] * num_rows)
+            case_columns.append([VariantFile.CASE_REFERENCE] * num_rows)
+            # The reference builder compares each cell with rs_codes['ref_code']; a
+            # reference cell holds ref_code itself, so this is True unless ref_code is NaN
+            code_type_columns.append([ref_code == ref_code] * num_rows)
+
+        # Overwrite the cells with a variant call
+        for i, j, frequency_value in self._selected_calls(rows, rs_ids):
+            rs_codes = self.rs_data[rs_ids[j]]
+            case = VariantFile.case_for_frequency_value(frequency_value)
+            for position in (0, 1):
+                code = VariantFile.code_for_frequency_value(frequency_value, rs_codes, position)
+                code_columns[j][i * 2 + position] = code
+                case_columns[j][i * 2 + position] = case
+                code_type_columns[j][i * 2 + position] = (code == rs_codes['ref_code'])
+
+        # Like the reference builder, a table without individuals has no columns
+        stats_data = {}
+        if rows:
+            individuals = [self.individual_ids[row] for row in rows for _ in (0, 1)]
+            stats_data[T["individual_column"]] = individuals
+            stats_data.update(zip(rs_ids, code_columns))
+
+        stats_df = pd.DataFrame(stats_data)
+        convert_code_columns(stats_df)
+
+        index = range(num_rows)
+        case_matrix = pd.DataFrame(dict(zip(rs_ids, case_columns)), index=index, columns=rs_ids)
+        code_type_matrix = pd.DataFrame(dict(zip(rs_ids, code_type_columns)), index=index, columns=rs_ids)
+
+        return stats_df, case_matrix, code_type_matrix
+
+    def nucleotides_table(self, rows=None, rs_ids=None):
+        """
+        Materialize the nucleotides table for a selection, with one row per individual.
+
+        Produces the same tables as genotype_tables.create_nucleotides_table.
+
+        Args:
+            rows (list, optional): Row numbers of the individuals to include, default all
+            rs_ids (list, optional): RS IDs to include, default all
+
+        Returns:
+            tuple: (nucl_df, nuc_case_matrix)
+        """
+        rows, rs_ids = self._resolve_selection(rows, rs_ids)
+        num_rows = len(rows)
+
+        # Start every column at the reference genotype
+        nucleotide_columns = []
+        case_columns = []
+        for rs_id in rs_ids:
+            nucleotide_columns.append([VariantFile.nucleotides_for_frequency_value(None, self.rs_data[rs_id])] * num_rows)
+            case_columns.append([VariantFile.CASE_REFERENCE] * num_rows)
+
+        # Overwrite the cells with a variant call
+        for i, j, frequency_value in self._selected_calls(rows, rs_ids):
+            nucleotide_columns[j][i] = VariantFile.nucleotides_for_frequency_value(frequency_value, self.rs_data[rs_ids[j]])
+            case_columns[j][i] = VariantFile.case_for_frequency_value(frequency_value)
+
+        nucl_data = {}
+        if rows:
+            nucl_data[T["individual_column"]] = [self.individual_ids[row] for row in rows]
+            nucl_data.update(zip(rs_ids, nucleotide_columns))
+
+        nucl_df = pd.DataFrame(nucl_data)
+        nuc_case_matrix = pd.DataFrame(dict(zip(rs_ids, case_columns)), index=range(num_rows), columns=rs_ids)
+
+        return nucl_df, nuc_case_matrix
+
+    def _resolve_selection(self, rows, rs_ids):
+        """
+        Replace missing selections with all rows or all RS IDs.
+
+        Returns:
+            tuple: (rows, rs_ids) as lists
+        """
+        rows = list(range(len(self.individual_ids))) if rows is None else list(rows)
+        rs_ids = list(self.rs_ids) if rs_ids is None else list(rs_ids)
+        return rows, rs_ids
+
+    def _selected_calls(self, rows, rs_ids):
+        """
+        Iterate over the stored calls that fall inside a selection.
+
+        Args:
+            rows (list): Row numbers of the selected individuals
+            rs_ids (list): Selected RS IDs
+
+        Yields:
+            tuple: (position in rows, position in rs_ids, frequency value)
+        """
+        selected_column = {self._column_of[rs_id]: j for j, rs_id in enumerate(rs_ids)}
+
+        for i, row in enumerate(rows):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            for column, frequency_value in zip(self.indices[start:end].tolist(), self.values[start:end]):
+                j = selected_column.get(column)
+                if j is not None:
+                    yield i, j, frequency_value
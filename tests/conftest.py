@@ -0,0 +1,27 @@
+import pytest
+import pandas as pd
+from rs_totales_file import RSTotalesFile
+from variant_file import VariantFile
+from tests.helpers import excel_upload
+
+
+@pytest.fixture
+def make_rs_file():
+    """Factory building an RSTotalesFile from a list of row dicts."""
+    def _make(rows):
+        return RSTotalesFile(excel_upload(pd.DataFrame(rows), "rs-totales.xlsx"))
+    return _make
+
+
+@pytest.fixture
+def make_variant_file():
+    """Factory building a VariantFile from a filename and a list of row dicts."""
+    def _make(name, rows):
+        columns = [
+            VariantFile.COL_DBSNP_ID,
+            VariantFile.COL_VARIANT_FREQUENCY,
+            VariantFile.COL_REFERENCE_ALLELE,
+            VariantFile.COL_VARIANT_ALLELE,
+        ]
+        return VariantFile(excel_upload(pd.DataFrame(rows, columns=columns), name))
+    return _make
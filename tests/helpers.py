@@ -0,0 +1,10 @@
+import io
+
+
+def excel_upload(df, name):
+    """Build an in-memory Excel file that behaves like a Streamlit upload."""
+    output = io.BytesIO()
+    df.to_excel(output, index=False)
+    output.seek(0)
+    output.name = name
+    return output
@@ -0,0 +1,178 @@
+import http.client
+import io
+import json
+import threading
+import time
+import urllib.request
+from urllib.error import HTTPError
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+import pytest
+from tests.helpers import excel_upload
+from api import create_server, JobService, WorkerPoolError, STATUS_DONE, STATUS_FAILED
+
+RS_ROWS = [
+    {'dbSNP ID': 'rs1', 'Reference Allele': 'A', 'Codigo reference allele': 101,
+     'Variant Allele': 'G', 'Codigo variant allele': 102},
+]
+
+
+@pytest.fixture
+def base_url():
+    server = create_server(port=0, service=JobService(executor=ThreadPoolExecutor(max_workers=2)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+
+
+def request(method, url, body=None):
+    with urllib.request.urlopen(urllib.request.Request(url, data=body, method=method)) as response:
+        return response.read()
+
+
+def request_status(method, url, body=None):
+    """Send a request and return the HTTP status code, including errors."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body, method=method)) as response:
+            return response.status
+    except HTTPError as e:
+        return e.code
+
+
+def run_job(base_url, rs_rows, variant_rows):
+    job = json.loads(request("POST", f"{base_url}/jobs"))
+    job_url = f"{base_url}/jobs/{job['job_id']}"
+    request("PUT", f"{job_url}/rs-totales", excel_upload(pd.DataFrame(rs_rows), "rs.xlsx").getvalue())
+    request("PUT", f"{job_url}/variant-tables/10-variant-table.xlsx",
+            excel_upload(pd.DataFrame(variant_rows), "10.xlsx").getvalue())
+    request("POST", f"{job_url}/submit?duplicate_policy=merge")
+
+    for _ in range(100):
+        status = json.loads(request("GET", job_url))
+        if status["status"] in (STATUS_DONE, STATUS_FAILED):
+            return job_url, status
+        time.sleep(0.05)
+    raise AssertionError("Job did not finish")
+
+
+def test_job_results_can_be_downloaded(base_url):
+    job_url, status = run_job(base_url, RS_ROWS, {
+        'dbSNP ID': ['rs1'], 'Variant Frequency': [0.5], 'Reference Allele': ['A'], 'Variant Allele': ['G']
+    })
+
+    assert status["status"] == STATUS_DONE
+    nucleotides = pd.read_csv(io.BytesIO(request("GET", f"{job_url}/results/nucleotides.csv")))
+    assert list(nucleotides.iloc[0]) == [10, 'AG']
+    codes = pd.read_excel(io.BytesIO(request("GET", f"{job_url}/results/codes.xlsx")))
+    assert list(codes['rs1']) == [101, 102]
+
+
+def test_job_results_can_be_downloaded_as_parquet(base_url):
+    job_url, status = run_job(base_url, RS_ROWS, {
+        'dbSNP ID': ['rs1'], 'Variant Frequency': [7], 'Reference Allele': ['A'], 'Variant Allele': ['G']
+    })
+
+    assert status["status"] == STATUS_DONE
+    codes = pd.read_parquet(io.BytesIO(request("GET", f"{job_url}/results/codes.parquet")))
+    # Code columns with error messages are stored as text
+    assert list(codes['rs1']) == ['ERROR (Invalid frequency: 7)'] * 2
+    nucleotides = pd.read_parquet(io.BytesIO(request("GET", f"{job_url}/results/nucleotides.parquet")))
+    assert list(nucleotides.columns) == list(codes.columns)
+
+
+def test_job_with_validation_errors_fails(base_url):
+    _, status = run_job(base_url, RS_ROWS, {'dbSNP ID': ['rs1']})
+
+    assert status["status"] == STATUS_FAILED
+    assert {issue["value"] for issue in status["validation_issues"]} == {
+        'Variant Frequency', 'Reference Allele', 'Variant Allele'
+    }
+
+
+def test_finished_job_can_be_deleted(base_url):
+    job_url, status = run_job(base_url, RS_ROWS, {
+        'dbSNP ID': ['rs1'], 'Variant Frequency': [0.5], 'Reference Allele': ['A'], 'Variant Allele': ['G']
+    })
+
+    assert status["variant_tables"] == ["10-variant-table.xlsx"]
+    assert request_status("PUT", f"{job_url}/variant-tables/20.xlsx", b"late") == 409
+    assert request_status("DELETE", job_url) == 200
+    assert request_status("GET", job_url) == 404
+
+
+def test_finished_jobs_are_evicted():
+    service = JobService(executor=ThreadPoolExecutor(max_workers=1), max_finished_jobs=1)
+    rs_totales = excel_upload(pd.DataFrame(RS_ROWS), "rs.xlsx").getvalue()
+    variant_table = excel_upload(pd.DataFrame({
+        'dbSNP ID': ['rs1'], 'Variant Frequency': [0.5], 'Reference Allele': ['A'], 'Variant Allele': ['G']
+    }), "10.xlsx").getvalue()
+
+    jobs = []
+    for _ in range(2):
+        job = service.create_job()
+        service.add_upload(job, "rs.xlsx", rs_totales, rs_totales=True)
+        service.add_upload(job, "10-variant-table.xlsx", variant_table)
+        service.submit(job)
+        job.future.result()
+        jobs.append(job)
+    # Uploads are released once submitted
+    assert jobs[0].variant_tables == [] and jobs[0].rs_totales is None
+
+    for _ in range(100):
+        if all(job.finished_at is not None for job in jobs):
+            break
+        time.sleep(0.01)
+    service.create_job()
+    service.shutdown()
+
+    assert service.get_job(jobs[0].id) is None
+    assert service.get_job(jobs[1].id) is jobs[1]
+
+
+class KilledWorkersExecutor:
+    """Executor whose workers were killed."""
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("A worker was killed")
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_broken_worker_pool_is_replaced(monkeypatch):
+    executors = iter([KilledWorkersExecutor(), ThreadPoolExecutor(max_workers=1)])
+    monkeypatch.setattr(JobService, "_new_executor", lambda self: next(executors))
+    service = JobService()
+    rs_totales = excel_upload(pd.DataFrame(RS_ROWS), "rs.xlsx").getvalue()
+    variant_table = excel_upload(pd.DataFrame({
+        'dbSNP ID': ['rs1'], 'Variant Frequency': [0.5], 'Reference Allele': ['A'], 'Variant Allele': ['G']
+    }), "10.xlsx").getvalue()
+
+    def new_job():
+        job = service.create_job()
+        service.add_upload(job, "rs.xlsx", rs_totales, rs_totales=True)
+        service.add_upload(job, "10-variant-table.xlsx", variant_table)
+        return job
+
+    with pytest.raises(WorkerPoolError):
+        service.submit(new_job())
+    assert service._pending == 0
+
+    job = new_job()
+    service.submit(job)
+    job.future.result()
+    service.shutdown()
+
+
+def test_malformed_content_length_is_rejected(base_url):
+    job = json.loads(request("POST", f"{base_url}/jobs"))
+    connection = http.client.HTTPConnection(base_url.removeprefix("http://"))
+    connection.putrequest("PUT", f"/jobs/{job['job_id']}/rs-totales")
+    connection.putheader("Content-Length", "abc")
+    connection.endheaders()
+    assert connection.getresponse().status == 400
+    connection.close()
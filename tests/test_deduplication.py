@@ -0,0 +1,89 @@
+import io
+import pandas as pd
+from tests.helpers import excel_upload
+from deduplication import (
+    load_variant_files,
+    POLICY_KEEP_FIRST, POLICY_KEEP_LATEST, POLICY_MERGE, POLICY_FLAG,
+    REASON_IDENTICAL_CONTENT, REASON_SAME_INDIVIDUAL, ACTION_DROPPED, ACTION_MERGED, ACTION_KEPT,
+    COL_FILE, COL_DUPLICATE_OF, COL_REASON, COL_ACTION
+)
+
+COLUMNS = ['dbSNP ID', 'Variant Frequency', 'Reference Allele', 'Variant Allele']
+
+
+def upload(name, rows):
+    return excel_upload(pd.DataFrame(rows, columns=COLUMNS), name)
+
+
+def copy_upload(file, name):
+    """Byte-identical copy of an upload under another name."""
+    copy = io.BytesIO(file.getvalue())
+    copy.name = name
+    return copy
+
+
+def report_entries(report):
+    return list(zip(report[COL_FILE], report[COL_DUPLICATE_OF], report[COL_REASON], report[COL_ACTION]))
+
+
+def test_identical_files_are_parsed_once():
+    original = upload("10-a.xlsx", [('rs1', 1, 'A', 'G')])
+    files = [original, copy_upload(original, "10-b.xlsx"), copy_upload(original, "20-a.xlsx")]
+
+    variant_files, report = load_variant_files(files, POLICY_KEEP_FIRST)
+
+    assert [vf.name for vf in variant_files] == ["10-a.xlsx", "20-a.xlsx"]
+    assert variant_files[0].data is variant_files[1].data
+    assert report_entries(report) == [
+        ("10-b.xlsx", "10-a.xlsx", REASON_IDENTICAL_CONTENT, ACTION_DROPPED),
+        ("20-a.xlsx", "10-a.xlsx", REASON_IDENTICAL_CONTENT, ACTION_KEPT),
+    ]
+
+
+def test_flag_keeps_identical_files_of_the_same_individual():
+    original = upload("10-a.xlsx", [('rs1', 1, 'A', 'G')])
+    files = [original, copy_upload(original, "10-b.xlsx"), upload("10-c.xlsx", [('rs2', 1, 'C', 'T')])]
+
+    variant_files, report = load_variant_files(files, POLICY_FLAG)
+
+    assert [vf.name for vf in variant_files] == ["10-a.xlsx", "10-b.xlsx", "10-c.xlsx"]
+    assert variant_files[0].data is variant_files[1].data
+    assert report_entries(report) == [
+        ("10-b.xlsx", "10-a.xlsx", REASON_IDENTICAL_CONTENT, ACTION_KEPT),
+        ("10-c.xlsx", "10-a.xlsx", REASON_SAME_INDIVIDUAL, ACTION_KEPT),
+    ]
+
+
+def test_default_policy_keeps_every_file():
+    # Individual IDs only use the leading digits, so different samples can share one
+    files = [upload("2024-sampleA.xlsx", [('rs1', 1, 'A', 'G')]), upload("2024-sampleB.xlsx", [('rs2', 1, 'C', 'T')])]
+
+    variant_files, report = load_variant_files(files)
+
+    assert [vf.name for vf in variant_files] == ["2024-sampleA.xlsx", "2024-sampleB.xlsx"]
+    assert report_entries(report) == [("2024-sampleB.xlsx", "2024-sampleA.xlsx", REASON_SAME_INDIVIDUAL, ACTION_KEPT)]
+
+
+def test_same_individual_policies():
+    def files():
+        return [
+            upload("10-old.xlsx", [('rs1', 1, 'A', 'G')]),
+            upload("20-a.xlsx", [('rs2', 1, 'C', 'T')]),
+            upload("10-new.xlsx", [('rs1', 0.5, 'A', 'G'), ('rs3', 1, 'G', 'A')]),
+        ]
+
+    kept_first, _ = load_variant_files(files(), POLICY_KEEP_FIRST)
+    kept_latest, report = load_variant_files(files(), POLICY_KEEP_LATEST)
+    merged, merge_report = load_variant_files(files(), POLICY_MERGE)
+    flagged, flag_report = load_variant_files(files(), POLICY_FLAG)
+
+    assert [vf.name for vf in kept_first] == ["10-old.xlsx", "20-a.xlsx"]
+    assert [vf.name for vf in kept_latest] == ["20-a.xlsx", "10-new.xlsx"]
+    assert report_entries(report) == [("10-old.xlsx", "10-new.xlsx", REASON_SAME_INDIVIDUAL, ACTION_DROPPED)]
+
+    assert [vf.name for vf in merged] == ["10-old.xlsx", "20-a.xlsx"]
+    assert merged[0].frequency_values(['rs1', 'rs3']) == {'rs1': "1", 'rs3': "1"}
+    assert report_entries(merge_report) == [("10-new.xlsx", "10-old.xlsx", REASON_SAME_INDIVIDUAL, ACTION_MERGED)]
+
+    assert len(flagged) == 3
+    assert report_entries(flag_report) == [("10-new.xlsx", "10-old.xlsx", REASON_SAME_INDIVIDUAL, ACTION_KEPT)]
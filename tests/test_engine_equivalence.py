@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from benchmarks.equivalence import ENGINES, make_cohort, compare_engine, compare_tables
+from variant_file import VariantFile
+
+SEEDS = range(5)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("engine_name", ENGINES)
+def test_engine_matches_reference(engine_name, seed):
+    rs_file, variant_files = make_cohort(num_rs=40, num_individuals=12, calls_per_individual=15, seed=seed)
+
+    differences = compare_engine(ENGINES[engine_name], variant_files, rs_file.rs_data)
+
+    assert differences == [], "\n".join(differences[:20])
+
+
+@pytest.mark.parametrize("engine_name", ENGINES)
+def test_engine_matches_reference_on_selection(engine_name):
+    rs_file, variant_files = make_cohort(num_rs=40, num_individuals=12, calls_per_individual=15, seed=42)
+    rs_ids = list(rs_file.rs_data)[::3]
+
+    differences = compare_engine(ENGINES[engine_name], variant_files, rs_file.rs_data, rows=[7, 2, 11], rs_ids=rs_ids)
+
+    assert differences == [], "\n".join(differences[:20])
+
+
+@pytest.mark.parametrize("engine_name", ENGINES)
+def test_engine_matches_reference_without_individuals(engine_name):
+    rs_file, _ = make_cohort(num_rs=5, num_individuals=0, calls_per_individual=0)
+
+    assert compare_engine(ENGINES[engine_name], [], rs_file.rs_data) == []
+
+
+def test_compare_tables_detects_type_changes():
+    differences = compare_tables(pd.DataFrame({'rs1': [101, 'ERROR']}), pd.DataFrame({'rs1': [101.0, 'ERROR']}), "stats_df")
+
+    assert differences == ["stats_df[0, 'rs1']: 101 != 101.0"]
+
+
+@pytest.mark.parametrize("engine_name", ENGINES)
+def test_engine_matches_reference_next_to_error_cells(engine_name, make_rs_file, make_variant_file):
+    # A column with an invalid frequency must still export integer codes, as the reference does
+    rs_file = make_rs_file([
+        {'dbSNP ID': 'rs1', 'Reference Allele': 'A', 'Codigo reference allele': 101,
+         'Variant Allele': 'G', 'Codigo variant allele': 102},
+    ])
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('rs1', 2, 'A', 'G')]),
+        make_variant_file("20-variant-table.xlsx", [('rs1', 0.5, 'A', 'G')]),
+    ]
+
+    assert compare_engine(ENGINES[engine_name], variant_files, rs_file.rs_data) == []
+
+
+@pytest.mark.parametrize("frequency, expected", [
+    (0.5, "0.5"),
+    ("0,5", "0.5"),
+    (1, "1"),
+    ("1,000", "1"),
+    ("10", "1"),
+    (1.7, "1"),
+    (0.25, "0.5"),
+    ("0,75", "1"),
+    (0.74, "0.5"),
+    (0.24, "0"),
+    (2, "ERROR (Invalid frequency: 2)"),
+    ("-0,5", "ERROR (Invalid frequency: -0.5)"),
+])
+def test_frequency_values_are_pinned(frequency, expected):
+    assert VariantFile._determine_frequency_value(frequency) == expected
@@ -0,0 +1,58 @@
+import pytest
+from genotype_store import GenotypeStore
+from translations import SPANISH as T
+
+RS_ROWS = [
+    {'dbSNP ID': 'rs1', 'Reference Allele': 'A', 'Codigo reference allele': 101,
+     'Variant Allele': 'G', 'Codigo variant allele': 102, 'Gene': 'BRCA1'},
+    {'dbSNP ID': 'rs2', 'Reference Allele': 'C', 'Codigo reference allele': 201,
+     'Variant Allele': 'T', 'Codigo variant allele': 202, 'Gene': 'TP53'},
+    {'dbSNP ID': 'rs3', 'Reference Allele': 'G', 'Codigo reference allele': 301,
+     'Variant Allele': 'A', 'Codigo variant allele': 302, 'Gene': 'TP53'},
+]
+
+
+@pytest.fixture
+def store(make_rs_file, make_variant_file):
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('rs1', 1, 'A', 'G')]),
+        make_variant_file("20-variant-table.xlsx", [('RS2', 0.5, 'C', 'T')]),
+    ]
+    return GenotypeStore(make_rs_file(RS_ROWS), variant_files)
+
+
+def test_query_without_filters_returns_full_tables(store):
+    result = store.query()
+
+    assert list(result.nucleotides_table.columns) == [T["individual_column"], 'rs1', 'rs2', 'rs3']
+    assert list(result.nucleotides_table[T["individual_column"]]) == ['10', '20']
+
+
+def test_query_filters_by_rs_gene_and_individual(store):
+    result = store.query(rs_ids=['RS1'], genes=['TP53'], individual_ids=['20'])
+
+    assert result.rs_ids == ['rs1', 'rs2', 'rs3']
+    assert list(result.nucleotides_table.iloc[0]) == ['20', 'AA', 'CT', 'GG']
+    assert len(result.codes_table) == 2
+
+
+def test_query_result_views_are_built_once(store):
+    builds = []
+
+    def build(result):
+        builds.append(result)
+        return result.codes_table.to_csv(index=False)
+
+    first = store.query().view("codes_csv", build)
+    second = store.query().view("codes_csv", build)
+
+    assert first is second
+    assert len(builds) == 1
+
+
+def test_query_results_are_cached(store):
+    first = store.query(genes=['TP53'])
+    second = store.query(rs_ids=['rs3', 'rs2'])
+
+    assert first is second
+    assert first.rs_ids == ['rs2', 'rs3']
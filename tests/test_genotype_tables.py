@@ -0,0 +1,30 @@
+import pandas as pd
+from genotype_tables import create_statistics_table, convert_code_columns
+from translations import SPANISH as T
+
+RS_ROWS = [
+    {'dbSNP ID': 'rs1', 'Reference Allele': 'A', 'Codigo reference allele': 101,
+     'Variant Allele': 'G', 'Codigo variant allele': 102},
+]
+
+
+def test_codes_are_exported_as_integers_next_to_error_cells(make_rs_file, make_variant_file):
+    # Before, a column with an error message exported its codes as 101.0
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('rs1', 7, 'A', 'G')]),
+        make_variant_file("20-variant-table.xlsx", [('rs1', 0.5, 'A', 'G')]),
+    ]
+
+    stats_df, _, _ = create_statistics_table(variant_files, make_rs_file(RS_ROWS).rs_data)
+
+    assert list(stats_df['rs1']) == ['ERROR (Invalid frequency: 7)'] * 2 + [101, 102]
+    assert stats_df.to_csv(index=False).splitlines()[-2:] == ["20,101", "20,102"]
+
+
+def test_convert_code_columns_keeps_text_codes():
+    stats_df = pd.DataFrame({T["individual_column"]: ['10', '10'], 'rs1': [101.0, 'C163']})
+
+    convert_code_columns(stats_df)
+
+    assert list(stats_df['rs1']) == [101, 'C163']
+    assert type(stats_df.at[0, 'rs1']) is int
@@ -0,0 +1,71 @@
+import cProfile
+import marshal
+import sys
+import time
+import pytest
+from profiling import profile_run, profiling_enabled_from_env, ProfilerBusyError, PROFILE_ENV_VAR
+
+
+def slow_function():
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profile_run_collects_pstats_and_collapsed_stacks():
+    with profile_run(sample_interval=0.001) as profile:
+        slow_function()
+
+    stats = marshal.loads(profile.pstats_data)
+    assert any(name == "slow_function" for _, _, name in stats)
+    assert "slow_function" in profile.summary
+
+    lines = profile.collapsed_stacks.splitlines()
+    assert lines
+    assert any("slow_function (test_profiling.py" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_run_times_are_not_cut_short_by_the_sampler():
+    with profile_run(sample_interval=0.001) as profile:
+        slow_function()
+
+    stats = marshal.loads(profile.pstats_data)
+    cumulative_time = next(value[3] for (_, _, name), value in stats.items() if name == "slow_function")
+    assert cumulative_time >= 0.09
+
+
+def test_profile_run_is_busy_while_another_profile_is_active():
+    with profile_run():
+        with pytest.raises(ProfilerBusyError):
+            with profile_run():
+                pass
+
+    # The lock is released, so a new run can be profiled
+    with profile_run() as profile:
+        slow_function()
+    assert profile.pstats_data
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="Several profilers can be active before Python 3.12")
+def test_profile_run_is_busy_under_another_profiler():
+    outer = cProfile.Profile()
+    outer.enable()
+    try:
+        with pytest.raises(ProfilerBusyError):
+            with profile_run():
+                pass
+    finally:
+        outer.disable()
+
+    with profile_run() as profile:
+        slow_function()
+    assert profile.pstats_data
+
+
+def test_profiling_enabled_from_env(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV_VAR, raising=False)
+    assert not profiling_enabled_from_env()
+
+    monkeypatch.setenv(PROFILE_ENV_VAR, "1")
+    assert profiling_enabled_from_env()
@@ -0,0 +1,77 @@
+from genotype_tables import create_statistics_table, create_nucleotides_table
+from sparse_genotypes import SparseGenotypeMatrix
+
+RS_ROWS = [
+    {'dbSNP ID': 'rs1', 'Reference Allele': 'A', 'Codigo reference allele': 101,
+     'Variant Allele': 'G', 'Codigo variant allele': 102},
+    {'dbSNP ID': 'rs2', 'Reference Allele': 'C', 'Codigo reference allele': 201,
+     'Variant Allele': 'T', 'Codigo variant allele': 202},
+    {'dbSNP ID': 'rs3', 'Reference Allele': 'G', 'Codigo reference allele': 301,
+     'Variant Allele': 'A', 'Codigo variant allele': 302},
+]
+
+
+def assert_same_cells(actual, expected):
+    """Compare as exported, so e.g. 101 and 101.0 differ."""
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.to_csv(index=False) == expected.to_csv(index=False)
+
+
+def test_matrix_stores_only_variant_calls(make_rs_file, make_variant_file):
+    rs_file = make_rs_file(RS_ROWS)
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('RS1', '0,5', 'A', 'G'), ('rs9', 1, 'T', 'C')]),
+        make_variant_file("20-variant-table.xlsx", []),
+    ]
+
+    matrix = SparseGenotypeMatrix(variant_files, rs_file.rs_data)
+
+    assert matrix.shape == (2, 3)
+    assert matrix.num_calls == 1
+    assert list(matrix.indptr) == [0, 1, 1]
+
+
+def test_dense_views_match_reference_builders(make_rs_file, make_variant_file):
+    rs_file = make_rs_file(RS_ROWS)
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('rs1', 1, 'A', 'G'), ('rs1', 0.5, 'A', 'G'), ('RS3', '0,5', 'G', 'A')]),
+        make_variant_file("20-variant-table.xlsx", [('rs2', 7, 'C', 'T'), ('rs3', 0.2, 'G', 'A')]),
+        make_variant_file("30-variant-table.xlsx", []),
+    ]
+
+    matrix = SparseGenotypeMatrix(variant_files, rs_file.rs_data)
+
+    for actual, expected in zip(matrix.codes_table(), create_statistics_table(variant_files, rs_file.rs_data)):
+        assert_same_cells(actual, expected)
+    for actual, expected in zip(matrix.nucleotides_table(), create_nucleotides_table(variant_files, rs_file.rs_data)):
+        assert_same_cells(actual, expected)
+
+
+def test_dense_view_of_selection(make_rs_file, make_variant_file):
+    rs_file = make_rs_file(RS_ROWS)
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('rs1', 1, 'A', 'G')]),
+        make_variant_file("20-variant-table.xlsx", [('rs3', 0.5, 'G', 'A')]),
+    ]
+
+    nucl_df, nuc_case_matrix = SparseGenotypeMatrix(variant_files, rs_file.rs_data).nucleotides_table([1], ['rs3', 'rs1'])
+
+    assert list(nucl_df.iloc[0]) == ['20', 'GA', 'AA']
+    assert list(nuc_case_matrix.iloc[0]) == ['HETEROZYGOUS', 'REFERENCE']
+
+
+def test_codes_stay_integers_next_to_error_cells(make_rs_file, make_variant_file):
+    rs_file = make_rs_file(RS_ROWS)
+    variant_files = [
+        make_variant_file("10-variant-table.xlsx", [('rs1', 7, 'A', 'G')]),
+        make_variant_file("20-variant-table.xlsx", [('rs1', 0.5, 'A', 'G')]),
+        make_variant_file("30-variant-table.xlsx", []),
+    ]
+
+    stats_df, _, _ = SparseGenotypeMatrix(variant_files, rs_file.rs_data).codes_table()
+    reference_df, _, _ = create_statistics_table(variant_files, rs_file.rs_data)
+
+    assert list(stats_df['rs1']) == ['ERROR (Invalid frequency: 7)'] * 2 + [101, 102, 101, 101]
+    assert all(type(code) is int for code in stats_df['rs1'][2:])
+    assert_same_cells(stats_df, reference_df)
+    assert "101.0" not in reference_df.to_csv(index=False)
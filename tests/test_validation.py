@@ -0,0 +1,117 @@
+import io
+import pandas as pd
+import validation
+from tests.helpers import excel_upload
+from validation import (
+    validate_files, has_errors,
+    ISSUE_MISSING_COLUMN, ISSUE_INVALID_RS, ISSUE_DUPLICATE_RS, ISSUE_INVALID_FREQUENCY, ISSUE_IDENTICAL_CONTENT,
+    COL_FILE, COL_ISSUE, COL_ROW, COL_VALUE
+)
+
+RS_COLUMNS = ['dbSNP ID', 'Reference Allele', 'Codigo reference allele', 'Variant Allele', 'Codigo variant allele']
+
+
+def test_validate_files_reports_all_issues_at_once():
+    rs_file = excel_upload(pd.DataFrame([
+        ('rs1', 'A', 101, 'G', 102),
+        ('x2', 'C', 201, 'T', 202),
+        ('RS1', 'A', 101, 'G', 102),
+    ], columns=RS_COLUMNS), "rs-totales.xlsx")
+    variant_ok = excel_upload(pd.DataFrame({
+        'dbSNP ID': ['rs1', 'rs1'],
+        'Variant Frequency': ['1,000', 3],
+        'Reference Allele': ['A', 'A'],
+        'Variant Allele': ['G', 'G'],
+    }), "10-variant-table.xlsx")
+    variant_missing = excel_upload(pd.DataFrame({'dbSNP ID': ['rs1']}), "20-variant-table.xlsx")
+
+    report = validate_files(rs_file, [variant_ok, variant_missing])
+
+    issues = set(zip(report[COL_FILE], report[COL_ISSUE], report[COL_ROW].fillna(0), report[COL_VALUE].astype(str)))
+    assert ("rs-totales.xlsx", ISSUE_INVALID_RS, 3, "x2") in issues
+    assert ("rs-totales.xlsx", ISSUE_DUPLICATE_RS, 4, "RS1") in issues
+    assert ("10-variant-table.xlsx", ISSUE_DUPLICATE_RS, 3, "rs1") in issues
+    assert ("10-variant-table.xlsx", ISSUE_INVALID_FREQUENCY, 3, "3") in issues
+    assert ("20-variant-table.xlsx", ISSUE_MISSING_COLUMN, 0, "Variant Frequency") in issues
+    assert len(report) == 7
+    assert has_errors(report)
+
+
+def test_validate_files_without_issues():
+    rs_file = excel_upload(pd.DataFrame([('rs1', 'A', 101, 'G', 102)], columns=RS_COLUMNS), "rs-totales.xlsx")
+
+    report = validate_files(rs_file, [])
+
+    assert report.empty
+    assert not has_errors(report)
+
+
+def test_validate_variant_file_reads_key_columns_only():
+    variant = excel_upload(pd.DataFrame({
+        'Notes': ['first', None, 'third'],
+        'dbSNP ID': ['rs1', None, 'rs2'],
+        'Variant Frequency': [0.5, None, 0.2],
+        'Reference Allele': ['A', None, 'C'],
+        'Variant Allele': ['G', None, 'T'],
+    }), "10-variant-table.xlsx")
+
+    report = validate_files(excel_upload(pd.DataFrame([('rs1', 'A', 101, 'G', 102)], columns=RS_COLUMNS), "rs-totales.xlsx"), [variant])
+
+    # The empty row is skipped without shifting the row numbers
+    assert list(zip(report[COL_ISSUE], report[COL_ROW], report[COL_VALUE])) == [(ISSUE_INVALID_FREQUENCY, 4, 0.2)]
+
+
+def test_validate_files_in_worker_processes(monkeypatch):
+    rs_file = excel_upload(pd.DataFrame([('rs1', 'A', 101, 'G', 102), ('x2', 'C', 201, 'T', 202)], columns=RS_COLUMNS), "rs-totales.xlsx")
+    variant_files = [
+        excel_upload(pd.DataFrame({
+            'dbSNP ID': ['rs1'],
+            'Variant Frequency': [index],
+            'Reference Allele': ['A'],
+            'Variant Allele': ['G'],
+        }), f"{index}-variant-table.xlsx")
+        for index in range(3)
+    ]
+    sequential = validate_files(rs_file, variant_files)
+
+    monkeypatch.setattr(validation, "PARALLEL_MIN_FILES", 1)
+    parallel = validate_files(rs_file, variant_files, max_workers=2)
+
+    assert parallel.equals(sequential)
+    assert list(parallel[COL_ISSUE]) == [ISSUE_INVALID_RS, ISSUE_INVALID_FREQUENCY, ISSUE_INVALID_FREQUENCY]
+
+
+def test_identical_uploads_are_validated_once(monkeypatch):
+    rs_file = excel_upload(pd.DataFrame([('rs1', 'A', 101, 'G', 102)], columns=RS_COLUMNS), "rs-totales.xlsx")
+    original = excel_upload(pd.DataFrame({
+        'dbSNP ID': ['rs1'],
+        'Variant Frequency': [3],
+        'Reference Allele': ['A'],
+        'Variant Allele': ['G'],
+    }), "10-variant-table.xlsx")
+    copy = io.BytesIO(original.getvalue())
+    copy.name = "20-variant-table.xlsx"
+
+    validated = []
+    validate_variant_file = validation.validate_variant_file
+    monkeypatch.setattr(validation, "validate_variant_file", lambda file: validated.append(file.name) or validate_variant_file(file))
+
+    report = validate_files(rs_file, [original, copy])
+
+    assert validated == ["10-variant-table.xlsx"]
+    assert list(zip(report[COL_FILE], report[COL_ISSUE], report[COL_VALUE].astype(str))) == [
+        ("10-variant-table.xlsx", ISSUE_INVALID_FREQUENCY, "3"),
+        ("20-variant-table.xlsx", ISSUE_IDENTICAL_CONTENT, "10-variant-table.xlsx"),
+    ]
+
+
+def test_validate_files_in_process_when_parallel_is_off(monkeypatch):
+    rs_file = excel_upload(pd.DataFrame([('rs1', 'A', 101, 'G', 102)], columns=RS_COLUMNS), "rs-totales.xlsx")
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("A process pool was started")
+
+    monkeypatch.setattr(validation, "PARALLEL_MIN_FILES", 1)
+    monkeypatch.setattr(validation, "ProcessPoolExecutor", no_pool)
+
+    assert validate_files(rs_file, [], parallel=False).empty
@@ -23,7 +23,8 @@ SPANISH = {
     - 'Reference Allele'
     - 'Codigo reference allele'
     - 'Variant Allele'
-    - 'Codigo variant allele'""",
+    - 'Codigo variant allele'
+    Opcionalmente puede incluir una columna 'Gene' para filtrar por gen.""",
 
     "variant_tables_hint": """📋 Estos archivos deben contener las siguientes columnas:
     - 'dbSNP ID'
@@ -33,6 +34,74 @@ SPANISH = {
 
     "filename_hint": "📋 El nombre de cada archivo debe contener un identificador del individuo numérico (ej. '73-variant-table.xlsx' o '73-variant-table.xls' significa individuo 73)",
 
+    # Validation
+    "validate_button": "Validar archivos",
+    "validation_spinner": "Validando archivos...",
+    "validation_ok": "Validación completada: no se encontraron problemas.",
+    "validation_errors": "Se encontraron {} problemas. Corrige los errores antes de procesar.",
+    "validation_warnings": "Se encontraron {} advertencias. Los resultados pueden verse afectados.",
+    "validation_report_columns": {
+        "file": "Archivo",
+        "severity": "Gravedad",
+        "issue": "Problema",
+        "row": "Fila",
+        "value": "Valor"
+    },
+    "validation_severities": {
+        "ERROR": "Error",
+        "WARNING": "Advertencia"
+    },
+    "validation_issues": {
+        "UNREADABLE_FILE": "No se pudo leer el archivo",
+        "MISSING_COLUMN": "Falta la columna",
+        "INVALID_RS": "ID de RS inválido",
+        "DUPLICATE_RS": "dbSNP ID repetido",
+        "INVALID_FREQUENCY": "Frecuencia fuera de rango",
+        "IDENTICAL_CONTENT": "Contenido idéntico a otro archivo"
+    },
+
+    # Duplicate files
+    "duplicate_policy_label": "Archivos repetidos del mismo individuo",
+    "duplicate_policies": {
+        "keep_first": "Conservar el primero",
+        "keep_latest": "Conservar el último",
+        "merge": "Combinar (el primero tiene prioridad)",
+        "flag": "Conservar todos y marcarlos"
+    },
+    "duplicates_found": "Se encontraron {} archivos repetidos. Los archivos idénticos se procesaron una sola vez.",
+    "duplicate_report_columns": {
+        "file": "Archivo",
+        "duplicate_of": "Repetido de",
+        "reason": "Motivo",
+        "action": "Acción"
+    },
+    "duplicate_reasons": {
+        "IDENTICAL_CONTENT": "Contenido idéntico",
+        "SAME_INDIVIDUAL": "Mismo individuo"
+    },
+    "duplicate_actions": {
+        "DROPPED": "Descartado",
+        "MERGED": "Combinado",
+        "KEPT": "Conservado"
+    },
+
+    # Profiling
+    "profile_toggle": "Perfilar ejecución",
+    "profile_hint": "Mide el tiempo de cada función durante el procesamiento para diagnosticar ejecuciones lentas.",
+    "profile_header": "Perfil de Ejecución",
+    "profile_busy": "Ya se está perfilando otra ejecución; los archivos se procesan sin perfil.",
+    "profile_download_hint": "El archivo pstats se abre con herramientas como snakeviz; el archivo de pilas colapsadas con flamegraph.pl o speedscope.",
+    "download_button_pstats": "Descargar pstats",
+    "download_button_flamegraph": "Descargar pilas (flamegraph)",
+    "profile_summary_expander": "Funciones más costosas",
+
+    # Query filters
+    "filters_header": "Filtros",
+    "filters_hint": "Selecciona IDs de RS, genes o individuos para ver y descargar solo esa parte de las tablas. Sin selección se muestran todos.",
+    "filter_rs_ids_label": "IDs de RS",
+    "filter_genes_label": "Genes",
+    "filter_individuals_label": "Individuos",
+
     # Color legend
     "color_legend_header": "Leyenda de Colores",
     "color_homozygous": "Azul claro: Homocigoto (frecuencia = 1)",
@@ -0,0 +1,263 @@
+"""
+Fast pre-flight validation of the input files.
+
+Only the headers and key columns of each file are read, byte-identical
+uploads are validated once, and large batches of files are validated in
+parallel worker processes. All problems are collected into a single report
+instead of stopping at the first one.
+"""
+
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from file_utils import read_excel_columns, content_hash
+from rs_totales_file import RSTotalesFile
+from variant_file import VariantFile
+
+# Severity constants
+SEVERITY_ERROR = "ERROR"  # Processing cannot continue
+SEVERITY_WARNING = "WARNING"  # Processing continues, but results may be affected
+
+# Issue type constants
+ISSUE_UNREADABLE_FILE = "UNREADABLE_FILE"
+ISSUE_MISSING_COLUMN = "MISSING_COLUMN"
+ISSUE_INVALID_RS = "INVALID_RS"
+ISSUE_DUPLICATE_RS = "DUPLICATE_RS"
+ISSUE_INVALID_FREQUENCY = "INVALID_FREQUENCY"
+ISSUE_IDENTICAL_CONTENT = "IDENTICAL_CONTENT"
+
+# Report column names
+COL_FILE = "file"
+COL_SEVERITY = "severity"
+COL_ISSUE = "issue"
+COL_ROW = "row"
+COL_VALUE = "value"
+
+REPORT_COLUMNS = [COL_FILE, COL_SEVERITY, COL_ISSUE, COL_ROW, COL_VALUE]
+
+RS_TOTALES_COLUMNS = [
+    RSTotalesFile.COL_DBSNP_ID,
+    RSTotalesFile.COL_REFERENCE_ALLELE,
+    RSTotalesFile.COL_CODIGO_REFERENCE,
+    RSTotalesFile.COL_VARIANT_ALLELE,
+    RSTotalesFile.COL_CODIGO_VARIANT
+]
+
+VARIANT_COLUMNS = VariantFile.RELEVANT_COLUMNS + [VariantFile.COL_DBSNP_ID]
+
+# Files below which validation runs in this process, as starting workers costs more
+PARALLEL_MIN_FILES = 8
+
+# Start method of the worker processes: the callers (Streamlit, the HTTP API) are
+# multithreaded, and forking a multithreaded process can deadlock the child
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def validate_files(rs_totales_file, variant_tables_files, max_workers=None, parallel=True):
+    """
+    Validate the RS totales file and all variant files.
+
+    Variant files with the same contents as an earlier upload are not parsed
+    again: each copy is reported once, against the first upload. With
+    PARALLEL_MIN_FILES distinct files or more, files are validated in worker
+    processes, since parsing is CPU-bound and threads would share the GIL.
+
+    Args:
+        rs_totales_file: File object of the RS totales file
+        variant_tables_files: List of variant table file objects
+        max_workers (int, optional): Maximum number of worker processes
+        parallel (bool): False to always validate in this process, e.g. when
+                         already running in a worker process
+
+    Returns:
+        pd.DataFrame: One row per issue found, with REPORT_COLUMNS as columns
+    """
+    tasks = [(validate_rs_totales_file, rs_totales_file)]
+    copy_issues = []
+    first_by_hash = {}
+    for file in variant_tables_files:
+        digest = content_hash(file)
+        if digest in first_by_hash:
+            copy_issues.append(_issue(file.name, SEVERITY_WARNING, ISSUE_IDENTICAL_CONTENT, None, first_by_hash[digest].name))
+        else:
+            first_by_hash[digest] = file
+            tasks.append((validate_variant_file, file))
+
+    if not parallel or len(tasks) < PARALLEL_MIN_FILES:
+        results = [validator(file) for validator, file in tasks]
+    else:
+        # Workers receive the file contents, as uploaded file objects can't be pickled
+        mp_context = multiprocessing.get_context(WORKER_START_METHOD)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+            futures = [
+                executor.submit(_validate_contents, validator, file.name, _file_contents(file))
+                for validator, file in tasks
+            ]
+            results = [future.result() for future in futures]
+
+    issues = [issue for file_issues in results for issue in file_issues]
+    issues.extend(copy_issues)
+
+    return pd.DataFrame(issues, columns=REPORT_COLUMNS)
+
+
+def has_errors(report):
+    """
+    Check if a validation report contains issues that block processing.
+
+    Args:
+        report (pd.DataFrame): Report returned by validate_files
+
+    Returns:
+        bool: True if any issue has error severity
+    """
+    return bool((report[COL_SEVERITY] == SEVERITY_ERROR).any())
+
+
+def validate_rs_totales_file(file):
+    """
+    Validate the key columns of the RS totales file.
+
+    Reports missing columns, values that are not RS IDs and repeated RS IDs.
+
+    Args:
+        file: File object of the RS totales file
+
+    Returns:
+        list: Issue dictionaries
+    """
+    name = file.name
+    data, issues = _read_key_columns(file, RS_TOTALES_COLUMNS)
+    if data is None or RSTotalesFile.COL_DBSNP_ID not in data.columns:
+        return issues
+
+    rs_column = data[RSTotalesFile.COL_DBSNP_ID].dropna().astype(str).str.strip()
+
+    for index, value in rs_column.items():
+        if not value.lower().startswith("rs"):
+            issues.append(_issue(name, SEVERITY_ERROR, ISSUE_INVALID_RS, index, value))
+
+    issues.extend(_duplicate_issues(name, rs_column))
+
+    return issues
+
+
+def validate_variant_file(file):
+    """
+    Validate the key columns of a variant table file.
+
+    Reports missing columns, repeated dbSNP IDs (only the first occurrence
+    is used) and frequencies that cannot be mapped to 0.5 or 1.
+
+    Args:
+        file: File object of the variant table file
+
+    Returns:
+        list: Issue dictionaries
+    """
+    name = file.name
+    data, issues = _read_key_columns(file, VARIANT_COLUMNS)
+    if data is None:
+        return issues
+
+    if VariantFile.COL_DBSNP_ID in data.columns:
+        rs_column = data[VariantFile.COL_DBSNP_ID].dropna().astype(str)
+        issues.extend(_duplicate_issues(name, rs_column))
+
+    if VariantFile.COL_VARIANT_FREQUENCY in data.columns:
+        for index, frequency in data[VariantFile.COL_VARIANT_FREQUENCY].items():
+            if not VariantFile.is_valid_frequency(frequency):
+                issues.append(_issue(name, SEVERITY_WARNING, ISSUE_INVALID_FREQUENCY, index, frequency))
+
+    return issues
+
+
+def _read_key_columns(file, key_columns):
+    """
+    Read only the given columns of a file and report the ones that are missing.
+
+    Args:
+        file: File object to read
+        key_columns (list): Column names to read
+
+    Returns:
+        tuple: (data, issues) - data is None if the file could not be read
+    """
+    name = file.name
+    try:
+        data = read_excel_columns(file, key_columns)
+    except Exception as e:
+        return None, [_issue(name, SEVERITY_ERROR, ISSUE_UNREADABLE_FILE, None, str(e))]
+
+    issues = [
+        _issue(name, SEVERITY_ERROR, ISSUE_MISSING_COLUMN, None, col)
+        for col in key_columns if col not in data.columns
+    ]
+    return data, issues
+
+
+def _validate_contents(validator, name, contents):
+    """
+    Run a validator on file contents, in a worker process.
+
+    Args:
+        validator: validate_rs_totales_file or validate_variant_file
+        name (str): Name of the file
+        contents (bytes): Contents of the file
+
+    Returns:
+        list: Issue dictionaries
+    """
+    file = io.BytesIO(contents)
+    file.name = name
+    return validator(file)
+
+
+def _file_contents(file):
+    """Get the whole contents of a file object as bytes."""
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def _duplicate_issues(name, rs_column):
+    """
+    Report RS IDs that appear more than once, ignoring case.
+
+    Args:
+        name (str): Name of the file being validated
+        rs_column (pd.Series): RS ID values indexed by dataframe row
+
+    Returns:
+        list: One warning per repeated occurrence
+    """
+    duplicated = rs_column.str.strip().str.lower().duplicated()
+    return [
+        _issue(name, SEVERITY_WARNING, ISSUE_DUPLICATE_RS, index, rs_column[index])
+        for index in rs_column.index[duplicated]
+    ]
+
+
+def _issue(file_name, severity, issue, index, value):
+    """
+    Build an issue dictionary.
+
+    Args:
+        file_name (str): Name of the file with the issue
+        severity (str): One of the severity constants
+        issue (str): One of the issue type constants
+        index: Dataframe row index, or None if not related to a row
+        value: The offending value
+
+    Returns:
+        dict: The issue, with spreadsheet row numbers (header is row 1)
+    """
+    return {
+        COL_FILE: file_name,
+        COL_SEVERITY: severity,
+        COL_ISSUE: issue,
+        COL_ROW: None if index is None else int(index) + 2,
+        COL_VALUE: value
+    }
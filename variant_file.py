@@ -1,5 +1,5 @@
 import re
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from file_utils import read_excel_file
 
 class VariantFile:
@@ -16,16 +16,18 @@ class VariantFile:
 
     RELEVANT_COLUMNS = [COL_VARIANT_FREQUENCY, COL_REFERENCE_ALLELE, COL_VARIANT_ALLELE]
 
-    def __init__(self, file):
+    def __init__(self, file, data=None):
         """
         Initialize a VariantFile object.
 
         Args:
             file: A file object representing the variant table file
+            data (pd.DataFrame, optional): Already parsed contents of the file,
+                                           to avoid reading it again
         """
         self.file = file
         self.name = file.name
-        self.data = read_excel_file(file)
+        self.data = read_excel_file(file) if data is None else data
         self._validate_columns()
 
     def _validate_columns(self):
@@ -65,24 +67,7 @@ class VariantFile:
         Returns:
             str: One of the case constants
         """
-        # Find the data for this RS ID
-        variant_data = self._find_variant_data(rs_id)
-
-        # If the RS ID is not found in the variant file
-        if not variant_data:
-            return self.CASE_REFERENCE
-
-        # Process the variant frequency
-        frequency_value = self._determine_frequency_value(variant_data[self.COL_VARIANT_FREQUENCY])
-
-        # Determine case based on frequency
-        if frequency_value == "1":
-            return self.CASE_HOMOZYGOUS
-        elif frequency_value == "0.5":
-            return self.CASE_HETEROZYGOUS
-        else:
-            # For error cases, treat as reference
-            return self.CASE_REFERENCE
+        return self.case_for_frequency_value(self._frequency_value_for(rs_id))
 
     def sequence_for(self, rs_id, rs_reference_values, position):
         """
@@ -110,21 +95,98 @@ class VariantFile:
         Returns:
             int/str: Code value for the specified position
         """
-        # Find the data for this RS ID
-        variant_data = self._find_variant_data(rs_id)
+        return self.code_for_frequency_value(self._frequency_value_for(rs_id), rs_data[rs_id], position)
+
+    def nucleotide_pair(self, rs_id, rs_data):
+        """
+        Get the concatenated nucleotide pair for a given RS ID.
+
+        Args:
+            rs_id (str): The RS ID to search for
+            rs_data (dict): Dictionary with RS ID data
+
+        Returns:
+            str: Concatenated nucleotide pair
+        """
+        return self.nucleotides_for_frequency_value(self._frequency_value_for(rs_id), rs_data[rs_id])
+
+    def frequency_values(self, rs_ids):
+        """
+        Get the processed variant frequency of every given RS ID found in the file.
+
+        Matches RS IDs like _find_variant_data (case-insensitive, first
+        occurrence wins) but scans the file once instead of once per RS ID.
+
+        Args:
+            rs_ids (iterable): The RS IDs to search for
+
+        Returns:
+            dict: RS IDs found as keys and their frequency values as values
+        """
+        # Several RS IDs may differ only in case and match the same rows
+        rs_ids_by_key = {}
+        for rs_id in rs_ids:
+            rs_ids_by_key.setdefault(rs_id.lower(), []).append(rs_id)
+
+        keys = self.data[self.COL_DBSNP_ID].astype(str).str.lower()
+        first_rows = keys[keys.isin(list(rs_ids_by_key))].drop_duplicates()
+
+        frequency_values = {}
+        for index, key in first_rows.items():
+            frequency_value = self._determine_frequency_value(self.data.at[index, self.COL_VARIANT_FREQUENCY])
+            for rs_id in rs_ids_by_key[key]:
+                frequency_values[rs_id] = frequency_value
+
+        return frequency_values
+
+    @classmethod
+    def case_for_frequency_value(cls, frequency_value):
+        """
+        Determine which case applies for a processed variant frequency.
+
+        Args:
+            frequency_value (str or None): Result of _determine_frequency_value,
+                                           or None if the RS ID was not found
+
+        Returns:
+            str: One of the case constants
+        """
+        # If the RS ID is not found in the variant file
+        if frequency_value is None:
+            return cls.CASE_REFERENCE
 
+        # Determine case based on frequency
+        if frequency_value == "1":
+            return cls.CASE_HOMOZYGOUS
+        elif frequency_value == "0.5":
+            return cls.CASE_HETEROZYGOUS
+        else:
+            # For error cases, treat as reference
+            return cls.CASE_REFERENCE
+
+    @staticmethod
+    def code_for_frequency_value(frequency_value, rs_codes, position):
+        """
+        Get the code value for a processed variant frequency at the specified position.
+
+        Args:
+            frequency_value (str or None): Result of _determine_frequency_value,
+                                           or None if the RS ID was not found
+            rs_codes (dict): The RS ID data, with 'ref_code' and 'var_code'
+            position (int): Which position to return (0 for first allele, 1 for second)
+
+        Returns:
+            int/str: Code value for the specified position
+        """
         # Get the codes for this RS
-        ref_code = rs_data[rs_id]['ref_code']
-        var_code = rs_data[rs_id]['var_code']
+        ref_code = rs_codes['ref_code']
+        var_code = rs_codes['var_code']
 
         # If the RS ID is not found in the variant file,
         # return the reference code for both positions
-        if not variant_data:
+        if frequency_value is None:
             return ref_code
 
-        # Process the variant frequency
-        frequency_value = self._determine_frequency_value(variant_data[self.COL_VARIANT_FREQUENCY])
-
         # If frequency is 1, return variant code for both positions
         if frequency_value == "1":
             return var_code
@@ -139,32 +201,28 @@ class VariantFile:
         # Return error message for unexpected cases
         return frequency_value  # This will be the error message
 
-    def nucleotide_pair(self, rs_id, rs_data):
+    @staticmethod
+    def nucleotides_for_frequency_value(frequency_value, rs_alleles):
         """
-        Get the concatenated nucleotide pair for a given RS ID.
+        Get the concatenated nucleotide pair for a processed variant frequency.
 
         Args:
-            rs_id (str): The RS ID to search for
-            rs_data (dict): Dictionary with RS ID data
+            frequency_value (str or None): Result of _determine_frequency_value,
+                                           or None if the RS ID was not found
+            rs_alleles (dict): The RS ID data, with 'ref_allele' and 'var_allele'
 
         Returns:
             str: Concatenated nucleotide pair
         """
-        # Find the data for this RS ID
-        variant_data = self._find_variant_data(rs_id)
-
         # Get the nucleotides for this RS
-        ref_allele = rs_data[rs_id]['ref_allele']
-        var_allele = rs_data[rs_id]['var_allele']
+        ref_allele = rs_alleles['ref_allele']
+        var_allele = rs_alleles['var_allele']
 
         # If the RS ID is not found in the variant file,
         # return the reference allele duplicated
-        if not variant_data:
+        if frequency_value is None:
             return f"{ref_allele}{ref_allele}"
 
-        # Process the variant frequency
-        frequency_value = self._determine_frequency_value(variant_data[self.COL_VARIANT_FREQUENCY])
-
         # If frequency is 1, return variant allele duplicated
         if frequency_value == "1":
             return f"{var_allele}{var_allele}"
@@ -176,6 +234,24 @@ class VariantFile:
         # Return error message for unexpected cases
         return frequency_value  # This will be the error message
 
+    def _frequency_value_for(self, rs_id):
+        """
+        Get the processed variant frequency for a given RS ID.
+
+        Args:
+            rs_id (str): The RS ID to search for
+
+        Returns:
+            str or None: Result of _determine_frequency_value, or None if not found
+        """
+        # Find the data for this RS ID
+        variant_data = self._find_variant_data(rs_id)
+
+        if not variant_data:
+            return None
+
+        return self._determine_frequency_value(variant_data[self.COL_VARIANT_FREQUENCY])
+
     def _find_variant_data(self, rs_id):
         """
         Find the first occurrence of the given RS ID and extract relevant column values.
@@ -206,7 +282,21 @@ class VariantFile:
 
         return result
 
-    def _determine_frequency_value(self, frequency):
+    @classmethod
+    def is_valid_frequency(cls, frequency):
+        """
+        Check if a variant frequency can be mapped to 0.5 or 1.
+
+        Args:
+            frequency (float or str): The variant frequency
+
+        Returns:
+            bool: True if the frequency is valid, False otherwise
+        """
+        return cls._determine_frequency_value(frequency) in ("0.5", "1")
+
+    @staticmethod
+    def _determine_frequency_value(frequency):
         """
         Determine if frequency is closer to 0.5 or 1.
 
@@ -237,5 +327,5 @@ class VariantFile:
                 return str(rounded)
             else:
                 return f"ERROR (Invalid frequency: {freq})"
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError, InvalidOperation) as e:
             return f"ERROR: {str(e)}"